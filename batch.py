@@ -0,0 +1,169 @@
+'''
+File contains:
+    def specht_dependency_layers
+    def iter_batch_hilbert_series
+    def batch_hilbert_series
+'''
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from partitions import LowerOrderIdeal
+import specht_ideals
+from specht_ideals import (SPECHT_CACHE, IDEAL_CACHE, specht_recursion_step, all_lower_ideal_generators,
+                           ideal_specht_hilbert_series, lookup_series,
+                           has_structured_series)
+
+KINDS = ('specht', 'ideal', 'haiman-woo')
+
+# layers of the specht DAG with fewer partitions than this are cheaper to evaluate in this process than to ship out
+MIN_PARALLEL_LAYER = 256
+
+# the distinct partitions whose hilbert series specht_recursion_step needs for p
+def _dependencies(p):
+    if has_structured_series(p):
+        return []
+    deps = []
+    for gens in all_lower_ideal_generators(p):
+        for g in gens:
+            if g not in deps:
+                deps.append(g)
+    return deps
+
+# splits every partition the recursion for the targets needs into layers, where each partition only depends on
+# partitions in earlier layers, so the partitions of one layer can be evaluated independently
+# partitions in known (i.e. already computed) are not expanded and do not appear in the layers
+def specht_dependency_layers(partitions, known=()):
+    dependencies = {}
+    stack = [p for p in partitions if p not in known]
+    while len(stack) != 0:
+        p = stack.pop()
+        if p in dependencies:
+            continue
+        dependencies[p] = [g for g in _dependencies(p) if g not in known]
+        stack.extend(g for g in dependencies[p] if g not in dependencies)
+
+    # generators of p are partitions of |p| - 1, so going up in size visits dependencies first
+    levels = {}
+    layers = []
+    for p in sorted(dependencies, key=lambda p: p.size):
+        level = max((levels[g] + 1 for g in dependencies[p]), default=0)
+        levels[p] = level
+        if level == len(layers):
+            layers.append([])
+        layers[level].append(p)
+    return layers
+
+# worker task: evaluates a chunk of one layer given the series of everything the chunk depends on
+def _evaluate_specht_chunk(chunk, hilbert_series):
+    return [specht_recursion_step(p, hilbert_series) for p in chunk]
+
+# worker task: the series of I_L, with the series of every sub-ideal and partition the worker computed for it, so the
+# parent process can merge them into its caches
+def _evaluate_ideal(n, generators):
+    known = set(SPECHT_CACHE.keys())
+    sub_ideals = {}
+    hs = ideal_specht_hilbert_series(LowerOrderIdeal(n, generators), checkpoint=sub_ideals)
+    partitions = [(p, SPECHT_CACHE.get(p)) for p in SPECHT_CACHE.keys() if p not in known]
+    return hs, list(sub_ideals.items()), partitions
+
+# partitions whose series is in the specht cache or the persistent store
+class _KnownSeries:
+    def __contains__(self, p):
+        return lookup_series(SPECHT_CACHE, p) is not None
+
+def _iter_specht(partitions, executor, workers):
+    targets = set(partitions)
+    hilbert_series = {}
+    for p in targets:
+        cached = lookup_series(SPECHT_CACHE, p)
+        if cached is not None:
+            hilbert_series[p] = cached
+            yield p, cached
+
+    layers = specht_dependency_layers(targets - hilbert_series.keys(), known=_KnownSeries())
+    # fetch the known partitions the layers depend on now, before new results can evict them from a bounded cache
+    in_layers = {p for layer in layers for p in layer}
+    for g in {g for layer in layers for p in layer for g in _dependencies(p)} - in_layers:
+        hilbert_series[g] = lookup_series(SPECHT_CACHE, g)
+
+    for layer in layers:
+        if executor is None or len(layer) < max(MIN_PARALLEL_LAYER, workers):
+            values = [specht_recursion_step(p, hilbert_series) for p in layer]
+        else:
+            # a few chunks per worker, each shipped with only the series it needs
+            size = -(-len(layer) // (4 * workers))
+            chunks = [layer[i:i + size] for i in range(0, len(layer), size)]
+            futures = []
+            for chunk in chunks:
+                deps = {g: hilbert_series[g] for p in chunk for g in _dependencies(p)}
+                futures.append(executor.submit(_evaluate_specht_chunk, chunk, deps))
+            values = [hs for future in futures for hs in future.result()]
+
+        if specht_ideals.STORE is not None:
+            specht_ideals.STORE.put_many(zip(layer, values))
+        for p, hs in zip(layer, values):
+            hilbert_series[p] = hs
+            SPECHT_CACHE.put(p, hs)
+            if p in targets:
+                yield p, hs
+
+# yields (index, series) for every lower order ideal as soon as it is computed
+# each ideal is one task, and the sub-ideals and partitions the workers compute are merged into IDEAL_CACHE and
+# SPECHT_CACHE, so later ideals (and later calls) in this process reuse them
+def _iter_ideals(ideals, executor):
+    if executor is None:
+        for i, L in enumerate(ideals):
+            yield i, ideal_specht_hilbert_series(L)
+        return
+
+    futures = {executor.submit(_evaluate_ideal, L.n, L.generators): i for i, L in enumerate(ideals)}
+    for future in as_completed(futures):
+        hs, sub_ideals, partitions = future.result()
+        for key, sub in sub_ideals:
+            IDEAL_CACHE.put(key, sub)
+        for p, sub in partitions:
+            SPECHT_CACHE.put(p, sub)
+        yield futures[future], hs
+
+# I_mu / I_(<mu) = I_(<mu) - I_mu: the specht parts go through the layers of the specht DAG like the 'specht' kind,
+# and the ideal parts are tasks of _iter_ideals
+def _iter_haiman_woo(partitions, executor, workers):
+    specht = dict(_iter_specht(partitions, executor, workers))
+    targets = list(specht)
+    ideals = [mu.strictly_less_than_ideal() for mu in targets]
+    for i, hs in _iter_ideals(ideals, executor):
+        yield targets[i], hs - specht[targets[i]]
+
+# yields (key, hilbert series) for every target as soon as it is computed
+# kind is 'specht' or 'haiman-woo' for partitions, keyed by partition, or 'ideal' for lower order ideals, keyed by
+# LowerOrderIdeal.key()
+# workers is the number of processes (None uses every core, 1 computes everything in this process)
+# the dependency DAG of the partitions is evaluated layer by layer (for 'haiman-woo', of the specht parts of the
+# targets), and ideals are one task each, with the results of the workers merged into the caches of this process
+def iter_batch_hilbert_series(targets, kind='specht', workers=None):
+    if kind not in KINDS:
+        raise ValueError("kind must be one of " + ", ".join(KINDS))
+    targets = list(targets)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be a positive integer")
+
+    if workers == 1:
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if kind == 'specht':
+            yield from _iter_specht(targets, executor, workers)
+        elif kind == 'ideal':
+            for i, hs in _iter_ideals(targets, executor):
+                yield targets[i].key(), hs
+        else:
+            yield from _iter_haiman_woo(targets, executor, workers)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+# returns a dict of the hilbert series of all targets, see iter_batch_hilbert_series
+def batch_hilbert_series(targets, kind='specht', workers=None):
+    return dict(iter_batch_hilbert_series(targets, kind, workers))
@@ -0,0 +1,258 @@
+'''
+Benchmarks for the partition and Hilbert series hot paths.
+
+    python benchmarks.py --out results.json
+    python benchmarks.py --n 10..20 --only specht,ideal_specht --compare results.json
+    python benchmarks.py --n 10..20 --only specht --allocations
+
+Every benchmark is run over a range of n and reports wall time, peak traced memory and the number of memory blocks
+left allocated as JSON. With --allocations, the total number of blocks allocated during a run is counted as well,
+which also sees temporary objects that are freed again (this traces every opcode, so it is slow). With --compare, results are matched against a saved run and slowdowns beyond the threshold
+are flagged (the exit code is 1 when there is a regression).
+'''
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from partitions import Partition, Partitions, LowerOrderIdeal, clear_chipping_cache
+from expressions import HilbExpr, HilbSum
+from serialization import encode_many, decode_many
+from specht_ideals import (specht_hilbert_series, ideal_specht_hilbert_series, haiman_woo_hilbert_series,
+                           clear_specht_cache, clear_ideal_cache, clear_generator_cache)
+from specht import parse_n
+
+# staircase-like partition of n, i.e. (k, k - 1, ..., 1) with the remaining boxes in the first row
+def representative_partition(n):
+    k = 1
+    while (k + 1) * (k + 2) // 2 <= n:
+        k += 1
+    parts = list(range(k, 0, -1))
+    parts[0] += n - sum(parts)
+    return Partition(parts)
+
+def clear_caches():
+    clear_specht_cache()
+    clear_ideal_cache()
+    clear_generator_cache()
+    clear_chipping_cache()
+
+# each benchmark takes n, does its setup and returns the function that is timed
+def bench_partitions(n):
+    return lambda: Partitions(n)
+
+def bench_ideal_closure(n):
+    generators = representative_partition(n).get_covered_partitions()
+    return lambda: LowerOrderIdeal(n, generators)
+
+def bench_smaller_ideal(n):
+    L = representative_partition(n).strictly_less_than_ideal()
+    max_len = max(len(g) for g in L.generators)
+    return lambda: [L.smaller_ideal(k) for k in range(1, max_len + 1)]
+
+def bench_specht(n):
+    mu = representative_partition(n)
+    return lambda: specht_hilbert_series(mu)
+
+def bench_ideal_specht(n):
+    L = representative_partition(n).strictly_less_than_ideal()
+    return lambda: ideal_specht_hilbert_series(L)
+
+def bench_haiman_woo(n):
+    mu = representative_partition(n)
+    return lambda: haiman_woo_hilbert_series(mu)
+
+# the shapes with a structured series: the two-row and hook partitions of n
+def bench_structured(n):
+    shapes = [Partition([n - b, b]) for b in range(1, n // 2 + 1)]
+    shapes += [Partition([n - b] + [1] * b) for b in range(2, n - 1)]
+    return lambda: [specht_hilbert_series(p) for p in shapes]
+
+def bench_chipping(n):
+    mu = representative_partition(n)
+    return lambda: mu.get_chipping_sequences()
+
+def bench_chipping_count(n):
+    mu = representative_partition(n)
+    return lambda: mu.count_chipping_sequences()
+
+def bench_hilbexpr(n):
+    series = [specht_hilbert_series(p) for p in Partitions.iter(n)]
+    clear_caches()
+    def run():
+        total = HilbExpr(0)
+        for hs in series:
+            total = total + hs * HilbExpr.monomial(1, 1) - hs
+        return total
+    return run
+
+def bench_hilbsum(n):
+    series = [specht_hilbert_series(p) for p in Partitions.iter(n)]
+    clear_caches()
+    def run():
+        total = HilbSum()
+        for hs in series:
+            total.add(hs, 1, 1)
+            total.add(hs, sign=-1)
+        return total.result()
+    return run
+
+def bench_serialization(n):
+    results = [(p, specht_hilbert_series(p)) for p in Partitions.iter(n)]
+    clear_caches()
+    return lambda: decode_many(encode_many(results))
+
+# startup cost of a fresh worker process: imports the whole recursion in a new interpreter (n is not used)
+def bench_import(n):
+    command = [sys.executable, '-c', 'import specht_ideals, batch']
+    directory = os.path.dirname(os.path.abspath(__file__))
+    return lambda: subprocess.run(command, check=True, cwd=directory)
+
+BENCHMARKS = {
+    'partitions': (bench_partitions, range(10, 41, 10)),
+    'ideal_closure': (bench_ideal_closure, range(10, 31, 5)),
+    'smaller_ideal': (bench_smaller_ideal, range(10, 31, 5)),
+    'specht': (bench_specht, range(10, 31, 5)),
+    'ideal_specht': (bench_ideal_specht, range(8, 17, 2)),
+    'haiman_woo': (bench_haiman_woo, range(8, 17, 2)),
+    'structured': (bench_structured, range(10, 41, 10)),
+    'chipping': (bench_chipping, range(6, 13, 2)),
+    'chipping_count': (bench_chipping_count, range(10, 31, 5)),
+    'hilbexpr': (bench_hilbexpr, range(8, 17, 4)),
+    'hilbsum': (bench_hilbsum, range(8, 17, 4)),
+    'serialization': (bench_serialization, range(10, 31, 10)),
+    'import': (bench_import, [0]),
+}
+
+# runs run() with a tracer that reads sys.getallocatedblocks() before every bytecode and returns the sum of the
+# increases, i.e. the number of memory blocks allocated, including the ones that are freed again later
+# the blocks a single opcode (or C call) allocates and frees again are not seen, so this is a lower bound
+def count_allocations(run):
+    allocations = 0
+    last = sys.getallocatedblocks()
+    def trace(frame, event, arg):
+        nonlocal allocations, last
+        frame.f_trace_opcodes = True
+        blocks = sys.getallocatedblocks()
+        if blocks > last:
+            allocations += blocks - last
+        # read again, so the bookkeeping above is not counted
+        last = sys.getallocatedblocks()
+        return trace
+    sys.settrace(trace)
+    try:
+        run()
+    finally:
+        sys.settrace(None)
+    return allocations
+
+# runs one benchmark at one n: the best wall time over repeat runs, then one traced run for memory (and one for the
+# allocation count with allocations=True)
+# caches are cleared before every run so each one measures the full computation
+def measure(bench, n, repeat, allocations=False):
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        run = bench(n)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    clear_caches()
+    run = bench(n)
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    retained_blocks = sys.getallocatedblocks() - blocks
+    del result
+    row = {
+        'seconds': min(times),
+        'mean_seconds': sum(times) / len(times),
+        'peak_bytes': peak,
+        'retained_blocks': retained_blocks,
+    }
+    if allocations:
+        clear_caches()
+        row['allocations'] = count_allocations(bench(n))
+    return row
+
+def run_benchmarks(names, n_values=None, repeat=3, log=sys.stderr, allocations=False):
+    results = []
+    for name in names:
+        bench, default_n = BENCHMARKS[name]
+        for n in (n_values if n_values is not None else default_n):
+            row = {'benchmark': name, 'n': n}
+            row.update(measure(bench, n, repeat, allocations))
+            results.append(row)
+            if log is not None:
+                allocated = f" {row['allocations']:12d} allocations" if allocations else ""
+                print(f"{name:>15} n={n:<3} {row['seconds']:10.4f}s {row['peak_bytes'] / 2**20:9.2f} MiB{allocated}",
+                      file=log)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': results,
+    }
+
+# matches results against a baseline run and returns the rows that got slower (or bigger, or allocate more) than
+# threshold times, where allocations are only compared when both runs counted them
+def compare(report, baseline, threshold=1.25):
+    old = {(row['benchmark'], row['n']): row for row in baseline['results']}
+    regressions = []
+    for row in report['results']:
+        base = old.get((row['benchmark'], row['n']))
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_bytes', 'allocations'):
+            if metric not in row or metric not in base:
+                continue
+            if base[metric] > 0 and row[metric] / base[metric] > threshold:
+                regressions.append({'benchmark': row['benchmark'], 'n': row['n'], 'metric': metric,
+                                    'baseline': base[metric], 'current': row[metric],
+                                    'ratio': row[metric] / base[metric]})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the partition and Hilbert series hot paths")
+    parser.add_argument('--only', help="comma separated benchmarks to run (default: all), from " + ", ".join(BENCHMARKS))
+    parser.add_argument('--n', type=parse_n, help="values of n for every benchmark, i.e. 10..20 or 8,12,16")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark, the best one is reported")
+    parser.add_argument('--out', help="write the JSON report to this file instead of stdout")
+    parser.add_argument('--compare', help="baseline JSON report to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    parser.add_argument('--allocations', action='store_true', help="also count every allocated block (slow)")
+    args = parser.parse_args(argv)
+
+    names = list(BENCHMARKS) if args.only is None else args.only.split(',')
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name}")
+
+    report = run_benchmarks(names, args.n, args.repeat, allocations=args.allocations)
+    status = 0
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report, baseline, args.threshold)
+        for r in report['regressions']:
+            print(f"REGRESSION {r['benchmark']} n={r['n']} {r['metric']}: {r['baseline']:.6g} -> {r['current']:.6g} "
+                  f"({r['ratio']:.2f}x)", file=sys.stderr)
+        status = 1 if len(report['regressions']) > 0 else 0
+
+    if args.out is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
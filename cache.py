@@ -0,0 +1,70 @@
+'''
+File contains:
+    class CacheInfo
+    class HilbertCache
+'''
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class HilbertCache:
+    # maps hashable keys (partitions, canonical ideal keys, ...) to computed Hilbert series
+    # maxsize=None means the cache is unbounded, otherwise the least recently used entries are evicted
+    def __init__(self, maxsize=None):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    # returns the cached value for key (marking it as recently used), or default if it is not cached
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        if self.maxsize is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        self._data[key] = value
+        if self.maxsize is not None:
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # the cached keys, without counting as hits or changing the eviction order
+    def keys(self):
+        return list(self._data)
+
+    # changes the size bound, evicting the least recently used entries if the cache is now too big
+    def resize(self, maxsize):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+        self.maxsize = maxsize
+        if maxsize is not None:
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __repr__(self):
+        return f"HilbertCache(hits={self.hits}, misses={self.misses}, maxsize={self.maxsize}, currsize={len(self)})"
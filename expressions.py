@@ -1,14 +1,105 @@
-import sympy as sp
-t = sp.symbols('t')
-s = sp.symbols('s')
-ONE_MINUS_T = sp.Poly(1 - t, t, domain='ZZ')
+import math
+from fractions import Fraction
+from itertools import accumulate
+import instrumentation
+
+# --- Lazy SymPy ---
+# SymPy is only needed for symbolic input and output, so it is imported on first use instead of with this module
+# the symbols t, s and ONE_MINUS_T are still available as module attributes, i.e. from expressions import t, but
+# from expressions import * does not export them any more: use t, s = symbols() instead
+
+_SYMPY = None
+
+def _sympy():
+    """
+    (sympy, t, s), importing SymPy on the first call
+    """
+    global _SYMPY
+    if _SYMPY is None:
+        import sympy
+        _SYMPY = (sympy, sympy.symbols('t'), sympy.symbols('s'))
+    return _SYMPY
+
+def symbols():
+    """
+    The SymPy symbols (t, s) of the series, importing SymPy on the first call
+    """
+    _, t, s = _sympy()
+    return t, s
+
+def __getattr__(name):
+    if name == 'sp':
+        return _sympy()[0]
+    if name == 't':
+        return _sympy()[1]
+    if name == 's':
+        return _sympy()[2]
+    if name == 'ONE_MINUS_T':
+        sp, t, _ = _sympy()
+        return sp.Poly(1 - t, t, domain='ZZ')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Coefficient list helpers ---
+# numerators are plain lists of Python ints, lowest degree first, with no trailing zeros (the zero polynomial is [])
+
+def _trim(c):
+    while c and c[-1] == 0:
+        c.pop()
+    return c
+
+def _to_coeffs(numerator):
+    if isinstance(numerator, int):
+        return [numerator] if numerator != 0 else []
+    if isinstance(numerator, (list, tuple)):
+        return _trim([int(x) for x in numerator])
+    sp, t, _ = _sympy()
+    return _trim([int(x) for x in reversed(sp.Poly(numerator, t, domain='ZZ').all_coeffs())])
+
+def _add_coeffs(c1, c2):
+    if len(c1) < len(c2):
+        c1, c2 = c2, c1
+    result = list(c1)
+    for i, x in enumerate(c2):
+        result[i] += x
+    return _trim(result)
+
+def _mul_coeffs(c1, c2):
+    if not c1 or not c2:
+        return []
+    result = [0] * (len(c1) + len(c2) - 1)
+    for i, x in enumerate(c1):
+        if x:
+            for j, y in enumerate(c2):
+                result[i + j] += x * y
+    return result
+
+# multiplies by (1 - t)^k
+def _mul_one_minus_t(c, k):
+    for _ in range(k):
+        if not c:
+            break
+        c = [c[0]] + [c[i] - c[i - 1] for i in range(1, len(c))] + [-c[-1]]
+    return c
+
+# exact division by (1 - t), assuming c(1) == 0: the quotient coefficients are the prefix sums of c
+def _div_one_minus_t(c):
+    q = []
+    total = 0
+    for x in c[:-1]:
+        total += x
+        q.append(total)
+    return _trim(q)
 
 class HilbExpr:
     def __init__(self, numerator, a=0, simplify=False):
         """
         Represents h(t) / (1 - t)^a
+
+        The numerator can be given as an integer, a list of integer coefficients
+        (lowest degree first) or a SymPy expression in t. It is stored natively as
+        the coefficient list self.coeffs, so arithmetic never goes through SymPy.
         """
-        self.h = sp.Poly(numerator, t, domain='ZZ')
+        self.coeffs = _to_coeffs(numerator)
         self.a = int(a)
 
         if simplify:
@@ -17,6 +108,41 @@ class HilbExpr:
         if self.a < 0:
             raise ValueError("Exponent a must be nonnegative")
 
+    @classmethod
+    def _from_coeffs(cls, coeffs, a):
+        """
+        Build directly from a trimmed coefficient list, skipping coercion
+        """
+        result = cls.__new__(cls)
+        result.coeffs = coeffs
+        result.a = a
+        return result
+
+    def __reduce__(self):
+        return (HilbExpr._from_coeffs, (self.coeffs, self.a))
+
+    @classmethod
+    def monomial(cls, k, a=0):
+        """
+        Represents t^k / (1 - t)^a
+        """
+        return cls._from_coeffs([0] * k + [1], a)
+
+    # --- SymPy bridge ---
+    @property
+    def h(self):
+        """
+        Numerator as a SymPy Poly in t
+        """
+        sp, t, _ = _sympy()
+        return sp.Poly.from_list(list(reversed(self.coeffs)) or [0], t, domain='ZZ')
+
+    def to_sympy(self):
+        """
+        Numerator as a SymPy Poly in t (see as_expr for the whole series)
+        """
+        return self.h
+
     # --- Representation ---
     def __repr__(self):
         return f"HilbExpr({self.h}, {self.a})"
@@ -37,20 +163,20 @@ class HilbExpr:
         other = self._coerce(other)
         a = max(self.a, other.a)
 
-        h1 = self.h * ONE_MINUS_T**(a - self.a)
-        h2 = other.h * ONE_MINUS_T**(a - other.a)
-        result = HilbExpr((h1 + h2), a)
+        h1 = _mul_one_minus_t(self.coeffs, a - self.a)
+        h2 = _mul_one_minus_t(other.coeffs, a - other.a)
+        result = HilbExpr._from_coeffs(_add_coeffs(h1, h2), a)
         result.simplify()
         return result
 
     def __mul__(self, other):
         other = self._coerce(other)
-        result = HilbExpr((self.h * other.h), self.a + other.a)
+        result = HilbExpr._from_coeffs(_mul_coeffs(self.coeffs, other.coeffs), self.a + other.a)
         result.simplify()
         return result
 
     def __neg__(self):
-        return HilbExpr(-self.h, self.a)
+        return HilbExpr._from_coeffs([-x for x in self.coeffs], self.a)
 
     def __sub__(self, other):
         return self + (-other)
@@ -60,81 +186,464 @@ class HilbExpr:
         other = self._coerce(other)
         a = max(self.a, other.a)
 
-        h1 = self.h * ONE_MINUS_T**(a - self.a)
-        h2 = other.h * ONE_MINUS_T**(a - other.a)
+        h1 = _mul_one_minus_t(self.coeffs, a - self.a)
+        h2 = _mul_one_minus_t(other.coeffs, a - other.a)
 
-        return h1 - h2 == 0
+        return h1 == h2
 
     # --- Utilities ---
     def as_expr(self):
         """
         Convert to a SymPy expression
         """
-        return self.h / (1 - t)**self.a
+        t = _sympy()[1]
+        return self.h.as_expr() / (1 - t)**self.a
     
     def simplify(self):
         """
         Simplify by making self.a as small as possible
         """
-        if self.h == 0:
+        prof = instrumentation.ACTIVE
+        if prof is not None:
+            prof.count('normalizations')
+
+        if not self.coeffs:
             self.a = 0
             return
 
-        while self.a > 0 and self.h.eval(1) == 0:
-            self.h = self.h.exquo(ONE_MINUS_T)
+        while self.a > 0 and sum(self.coeffs) == 0:
+            self.coeffs = _div_one_minus_t(self.coeffs)
             self.a += -1
+            if prof is not None:
+                prof.count('exact_divisions')
 
     def degree(self):
         """
-        Degree of numerator polynomial
+        Degree of numerator polynomial (-inf for the zero polynomial, as in SymPy)
+        """
+        if not self.coeffs:
+            return -math.inf
+        return len(self.coeffs) - 1
+
+    # --- Hilbert function and polynomial ---
+    def _reduced(self):
+        """
+        (coefficients, a) of the simplified form, without changing self
+        """
+        c, a = self.coeffs, self.a
+        if not c:
+            return c, 0
+        while a > 0 and sum(c) == 0:
+            c = _div_one_minus_t(c)
+            a -= 1
+        return c, a
+
+    def hilbert_function(self, D):
+        """
+        Values H(0), ..., H(D) of the series, i.e. its coefficients up to t^D
+
+        Dividing by (1 - t) takes prefix sums, so this is `a` rounds of prefix
+        sums over the numerator coefficients and costs O(a D).
+        """
+        values = self.coeffs[:D + 1] + [0] * (D + 1 - len(self.coeffs))
+        for _ in range(self.a):
+            values = list(accumulate(values))
+        return values
+
+    def regularity_index(self):
+        """
+        Smallest d0 >= 0 such that H(d) equals the Hilbert polynomial for all d >= d0
         """
-        return sp.degree(self.h, t)
+        c, a = self._reduced()
+        return max(0, len(c) - a)
+
+    def hilbert_polynomial(self):
+        """
+        Hilbert polynomial P(d), as a list of Fraction coefficients (constant term first)
+
+        P is interpolated from a values of the Hilbert function past the
+        regularity index, using Newton forward differences.
+        """
+        c, a = self._reduced()
+        if a == 0:
+            return []
+        d0 = max(0, len(c) - a)
+        differences = self.hilbert_function(d0 + a - 1)[d0:]
+        newton = []
+        for _ in range(a):
+            newton.append(differences[0])
+            differences = [differences[i + 1] - differences[i] for i in range(len(differences) - 1)]
+
+        # P(d) = sum_k newton[k] * binomial(d - d0, k), expanded into powers of d
+        poly = [Fraction(0)] * a
+        basis = [Fraction(1)]
+        for k, coefficient in enumerate(newton):
+            if k > 0:
+                # binomial(d - d0, k) = binomial(d - d0, k - 1) * (d - d0 - k + 1) / k
+                shift = Fraction(-(d0 + k - 1))
+                basis = [(shift * basis[0]) / k] + [
+                    (basis[i - 1] + shift * (basis[i] if i < len(basis) else 0)) / k for i in range(1, len(basis) + 1)]
+            for i, x in enumerate(basis):
+                poly[i] += coefficient * x
+        while poly and poly[-1] == 0:
+            poly.pop()
+        return poly
+
+    def dimension(self):
+        """
+        Krull dimension, the order of the pole at t = 1 (-1 for the zero series)
+        """
+        c, a = self._reduced()
+        if not c:
+            return -1
+        return a
+
+    def multiplicity(self):
+        """
+        Multiplicity (degree), the numerator of the simplified form evaluated at t = 1
+        """
+        c, _ = self._reduced()
+        return sum(c)
     
+def hilbert_function_table(series, D):
+    """
+    Table of hilbert_function(D) for each series in an iterable of HilbExpr
+
+    This is one pass of prefix sums per series, each in linear time, rather
+    than a single pass over the stacked series: padding every series to the
+    largest a and summing the stacked columns was measured to be 3-4 times
+    slower in pure Python.
+    """
+    return [hs.hilbert_function(D) for hs in series]
+
+class HilbSum:
+    def __init__(self):
+        """
+        Accumulates a linear combination of shifted series t^k H(t) / (1 - t)^b.
+
+        Numerators with the same power of (1 - t) are summed in place, and the
+        groups are brought to one common denominator and simplified only once,
+        in result(), instead of after every addition.
+        """
+        self.terms = {} # power of (1 - t) -> summed numerator coefficients
+
+    def add(self, expr, k=0, b=0, sign=1):
+        """
+        Add sign * t^k * expr / (1 - t)^b, where sign is 1 or -1
+        """
+        c = expr.coeffs
+        if not c:
+            return
+        acc = self.terms.setdefault(expr.a + b, [])
+        if len(acc) < k + len(c):
+            acc.extend([0] * (k + len(c) - len(acc)))
+        if sign == 1:
+            for i, x in enumerate(c, k):
+                acc[i] += x
+        else:
+            for i, x in enumerate(c, k):
+                acc[i] -= x
+
+    def result(self):
+        """
+        The accumulated sum as a simplified HilbExpr
+        """
+        a = max(self.terms, default=0)
+        total = []
+        for b, c in self.terms.items():
+            total = _add_coeffs(total, _mul_one_minus_t(_trim(c), a - b))
+        result = HilbExpr._from_coeffs(total, a)
+        result.simplify()
+        return result
+
+# --- Bivariate helpers ---
+# numerators of equivariant series are sparse dicts {(i, j): c} for c t^i s^j with no zero coefficients, and
+# denominators are dicts {(i, j): m} for the product of the factors (1 - t^i s^j)^m
+#
+# the factors (1 - t^i s^j) are not coprime, i.e. (1 - t) divides (1 - t^2), so common denominators and cancellation
+# work in a coprime basis instead: with g = gcd(i, j) and the primitive monomial x = t^(i / g) s^(j / g),
+#     1 - x^g = prod over d | g of P_d(x),   P_1(x) = 1 - x and P_d = the d-th cyclotomic polynomial for d > 1
+# and the P_d(x) for different (direction, d) are distinct irreducible polynomials. Denominators in this basis are
+# dicts {((i, j), d): e} for prod P_d(t^i s^j)^e with gcd(i, j) = 1
+
+_CYCLOTOMIC = {1: [1, -1]} # d -> coefficients of P_d, lowest degree first
+
+def _divisors(g):
+    return [d for d in range(1, g + 1) if g % d == 0]
+
+# exact division of dense integer coefficient lists, where b has constant term 1 or -1, or None if b does not divide a
+def _div_dense(a, b):
+    if len(a) < len(b):
+        return [] if not any(a) else None
+    q = []
+    for r in range(len(a) - len(b) + 1):
+        x = a[r] - sum(b[k] * q[r - k] for k in range(1, min(r, len(b) - 1) + 1))
+        q.append(x * b[0])
+    if _mul_coeffs(q, b) != list(a):
+        return None
+    return q
+
+def _cyclotomic(d):
+    if d not in _CYCLOTOMIC:
+        # x^d - 1 divided by every Phi_e with e | d and e < d (Phi_1 = x - 1 = -P_1)
+        c = [-1] + [0] * (d - 1) + [1]
+        for e in _divisors(d)[:-1]:
+            c = _div_dense(c, _cyclotomic(e) if e > 1 else [-1, 1])
+        _CYCLOTOMIC[d] = c
+    return _CYCLOTOMIC[d]
+
+def _direction(i, j):
+    g = math.gcd(i, j)
+    return (i // g, j // g), g
+
+# the factors {(i, j): m} in the coprime basis
+def _to_basis(factors):
+    basis = {}
+    for (i, j), m in factors.items():
+        direction, g = _direction(i, j)
+        for d in _divisors(g):
+            basis[(direction, d)] = basis.get((direction, d), 0) + m
+    return basis
+
+# multiplies by P_d(t^i s^j)^k for the direction (i, j)
+def _mul_basis(n, direction, d, k):
+    i, j = direction
+    p = _cyclotomic(d)
+    for _ in range(k):
+        result = {}
+        for (a, b), c in n.items():
+            for r, x in enumerate(p):
+                if x != 0:
+                    key = (a + r * i, b + r * j)
+                    result[key] = result.get(key, 0) + c * x
+        n = {key: c for key, c in result.items() if c != 0}
+    return n
+
+# exact division by P_d(t^i s^j), or None if it does not divide n
+# the monomials of n fall into lines base + r (i, j), and on each line this is the division of a polynomial in one
+# variable by P_d
+def _div_basis(n, direction, d):
+    i, j = direction
+    lines = {}
+    for (a, b), c in n.items():
+        r = min(a // i if i else math.inf, b // j if j else math.inf)
+        lines.setdefault((a - r * i, b - r * j), {})[r] = c
+    p = _cyclotomic(d)
+    quotient = {}
+    for (a, b), line in lines.items():
+        q = _div_dense([line.get(r, 0) for r in range(max(line) + 1)], p)
+        if q is None:
+            return None
+        for r, x in enumerate(q):
+            if x != 0:
+                quotient[(a + r * i, b + r * j)] = x
+    return quotient
+
+# rewrites n / (denominator in the coprime basis) over a product of factors (1 - t^i s^j): for every direction the
+# largest remaining d gives the factor (1 - x^d), which covers P_e(x) for every e | d, and the P_e that were not
+# needed are multiplied into the numerator
+# returns (numerator, factors); the choice only depends on the basis exponents, so equal reduced values get equal forms
+def _cover(n, basis):
+    basis = {key: e for key, e in basis.items() if e > 0}
+    factors = {}
+    while basis:
+        direction, d = max(basis, key=lambda key: (key[0], key[1]))
+        i, j = direction
+        factor = (d * i, d * j)
+        factors[factor] = factors.get(factor, 0) + 1
+        for e in _divisors(d):
+            if basis.get((direction, e), 0) > 0:
+                basis[(direction, e)] -= 1
+                if basis[(direction, e)] == 0:
+                    del basis[(direction, e)]
+            else:
+                n = _mul_basis(n, direction, e, 1)
+    return n, factors
+
+# reduced form of n / (denominator in the coprime basis): cancels every basis factor dividing the numerator, so the
+# fraction is in lowest terms in the basis, and then writes the denominator as factors (1 - t^i s^j) with _cover
+def _reduce(n, basis):
+    if not n:
+        return {}, {}
+    prof = instrumentation.ACTIVE
+    basis = dict(basis)
+    for key in sorted(basis):
+        while basis[key] > 0:
+            quotient = _div_basis(n, *key)
+            if quotient is None:
+                break
+            n = quotient
+            basis[key] -= 1
+            if prof is not None:
+                prof.count('exact_divisions')
+    return _cover(n, basis)
+
+def _to_terms(numerator):
+    if isinstance(numerator, int):
+        return {(0, 0): numerator} if numerator != 0 else {}
+    if isinstance(numerator, dict):
+        return {(int(i), int(j)): int(c) for (i, j), c in numerator.items() if c != 0}
+    sp, t, s = _sympy()
+    if isinstance(numerator, sp.Poly):
+        numerator = numerator.as_expr()
+    return {(int(i), int(j)): int(c) for (i, j), c in sp.Poly(numerator, t, s, domain='ZZ').terms() if c != 0}
+
+# ((i, j), d, sign) with gcd(i, j) = 1 such that the sympy polynomial f is sign * P_d(t^i s^j), or None
+def _as_basis_factor(f):
+    sp, t, s = _sympy()
+    terms = dict(sp.Poly(f, t, s, domain='ZZ').terms())
+    top = max(terms, key=lambda key: key[0] + key[1])
+    if top == (0, 0):
+        return None
+    (i, j), degree = _direction(*top)
+    line = [0] * (degree + 1)
+    for (a, b), c in terms.items():
+        r = a // i if i else b // j
+        if (a, b) != (r * i, r * j):
+            return None
+        line[r] = int(c)
+    for sign in (1, -1):
+        # deg P_d = phi(d) >= sqrt(d / 2), so d <= 2 degree^2
+        for d in range(1, 2 * degree * degree + 1):
+            if [sign * x for x in _cyclotomic(d)] == line:
+                return (i, j), d, sign
+    return None
+
+# reads a denominator given as an int, a factor dict, or a SymPy expression or Poly that is a product of factors
+# (1 - t^i s^j) (or of their irreducible factors, i.e. an expanded (1 - t)^2 or 1 + t)
+# returns (factors, multiplier), where the numerator has to be multiplied by the terms dict multiplier (a sign, or the
+# basis factors a covering (1 - t^i s^j) adds)
+def _to_factors(denominator):
+    if isinstance(denominator, dict):
+        factors = {(int(i), int(j)): int(m) for (i, j), m in denominator.items() if m != 0}
+        if any(m < 0 or f == (0, 0) for f, m in factors.items()):
+            raise ValueError("Denominator factors must be (1 - t^i s^j) with (i, j) != (0, 0) to a positive power")
+        return factors, {(0, 0): 1}
+    if isinstance(denominator, int):
+        if denominator not in (1, -1):
+            raise ValueError("Denominator must be a product of factors (1 - t^i s^j)")
+        return {}, {(0, 0): denominator}
+    sp, t, s = _sympy()
+    if isinstance(denominator, sp.Poly):
+        denominator = denominator.as_expr()
+    coefficient, irreducible = sp.factor_list(sp.sympify(denominator), t, s)
+    if coefficient not in (1, -1):
+        raise ValueError("Denominator must be a product of factors (1 - t^i s^j)")
+    sign = int(coefficient)
+    basis = {}
+    for f, m in irreducible:
+        factor = _as_basis_factor(f)
+        if factor is None:
+            raise ValueError("Denominator must be a product of factors (1 - t^i s^j)")
+        direction, d, factor_sign = factor
+        basis[(direction, d)] = basis.get((direction, d), 0) + m
+        sign *= factor_sign ** m
+    return tuple(reversed(_cover({(0, 0): sign}, basis)))
+
+def _mul_terms(n1, n2):
+    result = {}
+    for (i1, j1), c1 in n1.items():
+        for (i2, j2), c2 in n2.items():
+            key = (i1 + i2, j1 + j2)
+            result[key] = result.get(key, 0) + c1 * c2
+    return {key: c for key, c in result.items() if c != 0}
+
 class EquivHilbExpr:
     def __init__(self, numerator, denominator=1, simplify=False):
         """
-        Represents n(t) / d(t)
+        Represents n(t, s) / prod (1 - t^i s^j)^m
+
+        The numerator can be given as an integer, a sparse dict {(i, j): c} of
+        the coefficients of t^i s^j or a SymPy expression in t and s. The
+        denominator is kept factored, as a dict {(i, j): m} of factor exponents;
+        it can be given as such a dict or as a SymPy expression or Poly that
+        is a product of factors (1 - t^i s^j). Arithmetic never goes through
+        SymPy, and its results are in the reduced form of simplify().
         """
-        self.n = sp.Poly(numerator, t, s, domain='ZZ')
-        self.d = sp.Poly(denominator, t, s, domain='ZZ')
+        self.d, multiplier = _to_factors(denominator)
+        self.n = _mul_terms(_to_terms(numerator), multiplier)
 
         if simplify:
             self.simplify()
 
+    @classmethod
+    def _from_terms(cls, n, d):
+        """
+        Build directly from a numerator dict and a factor dict, skipping coercion
+        """
+        result = cls.__new__(cls)
+        result.n = n
+        result.d = d
+        return result
+
+    # --- SymPy bridge ---
+    @property
+    def numerator(self):
+        """
+        Numerator as a SymPy Poly in t and s
+        """
+        sp, t, s = _sympy()
+        return sp.Poly.from_dict(self.n or {(0, 0): 0}, t, s, domain='ZZ')
+
+    @property
+    def denominator(self):
+        """
+        Denominator as an unexpanded SymPy product
+        """
+        sp, t, s = _sympy()
+        return sp.Mul(*[(1 - t**i * s**j)**m for (i, j), m in sorted(self.d.items())])
+
     # --- Representation ---
     def __repr__(self):
-        return f"HilbExpr({self.n}, {self.d})"
+        return f"EquivHilbExpr({self.numerator.as_expr()}, {self.denominator})"
 
     def __str__(self):
-        if self.d == 1:
-            return str(self.n)
-        return f"({self.n})/({self.d})"
+        if not self.d:
+            return str(self.numerator.as_expr())
+        return f"({self.numerator.as_expr()})/({self.denominator})"
 
     # --- Coercion ---
     def _coerce(self, other):
         if isinstance(other, EquivHilbExpr):
             return other
         if isinstance(other, HilbExpr):
-            return EquivHilbExpr(other.h, ONE_MINUS_T**other.a)
+            return EquivHilbExpr._from_terms({(i, 0): c for i, c in enumerate(other.coeffs) if c != 0},
+                                             {(1, 0): other.a} if other.a > 0 else {})
         return EquivHilbExpr(other, 1)
 
+    # numerators of self and other over their least common denominator, which is the larger exponent of every factor
+    # of the coprime basis, and that denominator in the basis
+    def _common(self, other):
+        b1 = _to_basis(self.d)
+        b2 = _to_basis(other.d)
+        basis = dict(b1)
+        for key, e in b2.items():
+            basis[key] = max(basis.get(key, 0), e)
+        n1 = self.n
+        n2 = other.n
+        for (direction, d), e in basis.items():
+            n1 = _mul_basis(n1, direction, d, e - b1.get((direction, d), 0))
+            n2 = _mul_basis(n2, direction, d, e - b2.get((direction, d), 0))
+        return n1, n2, basis
+
     # --- Arithmetic ---
     def __add__(self, other):
         other = self._coerce(other)
-        h1 = self.n * self.d
-        h2 = self.d * other.n
-        result = EquivHilbExpr((h1 + h2), self.d * other.d)
-        result.simplify()
-        return result
+        n1, n2, basis = self._common(other)
+        n = dict(n1)
+        for key, c in n2.items():
+            n[key] = n.get(key, 0) + c
+        return EquivHilbExpr._from_terms(*_reduce({key: c for key, c in n.items() if c != 0}, basis))
 
     def __mul__(self, other):
         other = self._coerce(other)
-        result = EquivHilbExpr((self.n * other.n), (self.d * other.d))
-        result.simplify()
-        return result
+        basis = _to_basis(self.d)
+        for key, e in _to_basis(other.d).items():
+            basis[key] = basis.get(key, 0) + e
+        return EquivHilbExpr._from_terms(*_reduce(_mul_terms(self.n, other.n), basis))
 
     def __neg__(self):
-        return EquivHilbExpr(-self.n, self.d)
+        return EquivHilbExpr._from_terms({key: -c for key, c in self.n.items()}, dict(self.d))
 
     def __sub__(self, other):
         return self + (-other)
@@ -142,20 +651,25 @@ class EquivHilbExpr:
     # --- Equality ---
     def __eq__(self, other):
         other = self._coerce(other)
-        h1 = self.n * other.d
-        h2 = self.d * other.n
-
-        return h1 - h2 == 0
+        n1, n2, _ = self._common(other)
+        return n1 == n2
 
     # --- Utilities ---
     def as_expr(self):
         """
         Convert to a SymPy expression
         """
-        return self.n / self.d
-    
+        return self.numerator.as_expr() / self.denominator
+
     def simplify(self):
         """
-        TODO: Fix
+        Bring to the reduced form
+
+        Common factors are cancelled in the coprime basis of the factors
+        (1 - t^i s^j) (see the bivariate helpers), and the denominator is then
+        rewritten canonically, so equal values have identical n and d.
         """
-        pass
\ No newline at end of file
+        prof = instrumentation.ACTIVE
+        if prof is not None:
+            prof.count('normalizations')
+        self.n, self.d = _reduce(self.n, _to_basis(self.d))
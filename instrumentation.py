@@ -0,0 +1,111 @@
+'''
+File contains:
+    class Profiler
+    def profile
+'''
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# the active profiler, or None when instrumentation is off
+# instrumented code reads this once and skips all bookkeeping when it is None, so the cost when off is one test
+ACTIVE = None
+
+class Profiler:
+    # collects event counters (recursion nodes, lower_ideal_generators computations, HilbExpr normalizations and exact
+    # divisions) and the time spent per recursion node, grouped by the size n of the partition or ideal
+    # callback, if given, is called as callback(profiler) every interval recursion nodes for live progress reports
+    def __init__(self, callback=None, interval=1000):
+        self.callback = callback
+        self.interval = interval
+        self.counts = Counter()
+        self.size_times = {} # (kind, n) -> [nodes, seconds]
+        self.nodes = 0
+        self.start_time = None
+        self.stop_time = None
+        self._cache_start = None
+        self._cache_stop = None
+
+    def count(self, event, k=1):
+        self.counts[event] += k
+
+    # records one finished recursion node of the given kind ('specht' or 'ideal') on partitions of n
+    # specht nodes are timed on their own, ideal nodes include the time of the sub-ideals they had to compute
+    def node(self, kind, n, seconds):
+        entry = self.size_times.get((kind, n))
+        if entry is None:
+            entry = self.size_times[(kind, n)] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        self.counts[kind + '_nodes'] += 1
+        self.nodes += 1
+        if self.callback is not None and self.nodes % self.interval == 0:
+            self.callback(self)
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.stop_time or time.perf_counter()) - self.start_time
+
+    def _cache_infos(self):
+        import specht_ideals
+        return {'specht': specht_ideals.specht_cache_info(), 'ideal': specht_ideals.ideal_cache_info(),
+                'generators': specht_ideals.GENERATOR_CACHE.info()}
+
+    def start(self):
+        global ACTIVE
+        if ACTIVE is not None:
+            raise RuntimeError("Another profiler is already active")
+        self._cache_start = self._cache_infos()
+        self.start_time = time.perf_counter()
+        self.stop_time = None
+        ACTIVE = self
+
+    def stop(self):
+        global ACTIVE
+        if ACTIVE is self:
+            ACTIVE = None
+        self.stop_time = time.perf_counter()
+        self._cache_stop = self._cache_infos()
+
+    # cache hits and misses while the profiler was active
+    def cache_stats(self):
+        if self._cache_start is None:
+            return {}
+        stop = self._cache_stop or self._cache_infos()
+        stats = {}
+        for name, info in stop.items():
+            before = self._cache_start[name]
+            # a cleared cache restarts its counters, in which case everything it has now was counted here
+            if info.hits < before.hits or info.misses < before.misses:
+                before = before._replace(hits=0, misses=0)
+            stats[name] = {'hits': info.hits - before.hits, 'misses': info.misses - before.misses}
+        return stats
+
+    # structured summary of everything recorded so far
+    def report(self):
+        by_size = {}
+        for (kind, n), (nodes, seconds) in sorted(self.size_times.items()):
+            by_size.setdefault(kind, {})[n] = {'nodes': nodes, 'seconds': seconds}
+        return {
+            'elapsed_seconds': self.elapsed(),
+            'counts': dict(self.counts),
+            'caches': self.cache_stats(),
+            'by_size': by_size,
+        }
+
+    def __repr__(self):
+        return f"Profiler({self.nodes} nodes, {self.elapsed():.3f}s)"
+
+# context manager turning instrumentation on for the duration of a block
+#     with profile() as prof:
+#         specht_hilbert_series(mu)
+#     print(prof.report())
+@contextmanager
+def profile(callback=None, interval=1000):
+    profiler = Profiler(callback, interval)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
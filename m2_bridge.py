@@ -0,0 +1,203 @@
+'''
+Cross-validation of specht_hilbert_series against Macaulay2.
+
+    python m2_bridge.py --n 3..7
+    python m2_bridge.py --n 3..7 --stub
+
+All partitions are checked in one long-lived M2 session that loads specht_functions.m2 once and is fed the partitions
+in batches. When M2 is not installed the check is skipped with a message. --stub replaces M2 with a local stand-in
+process that speaks the same protocol, so the bridge itself can be tested without Macaulay2.
+
+File contains:
+    class M2Unavailable
+    class M2Session
+    def cross_validate
+'''
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+from partitions import Partition, Partitions
+from expressions import HilbExpr
+
+SPECHT_FUNCTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'specht_functions.m2')
+M2_ARGS = ['--silent', '--no-prompts', '--no-readline']
+STUB_COMMAND = [sys.executable, os.path.abspath(__file__), '--serve-stub']
+
+# protocol: every request is one line of M2 code, and the session answers with lines
+#     RESULT <index> <a> <exponent>:<coefficient>,...   poincare series numerator of S / I_mu over (1 - t)^a
+#     ERROR <index>                                     M2 failed on that partition
+#     DONE                                              end of a batch
+# any other output (echoed input, warnings) is ignored
+PRELUDE = '''
+pyHilbertSeries = (k, l) -> (
+    try (
+        I := SpechtIdeal(l);
+        terms := listForm poincare comodule I;
+        << "RESULT " << k << " " << numgens ring I << " "
+           << concatenate between(",", apply(terms, (e, c) -> toString(e#0) | ":" | toString(c))) << endl << flush;
+    ) else (
+        << "ERROR " << k << endl << flush;
+    );
+);
+pyDone = () -> (<< "DONE" << endl << flush;);
+'''
+
+class M2Unavailable(RuntimeError):
+    pass
+
+# parses the numerator of a RESULT line into a dense coefficient list
+def _parse_terms(field):
+    terms = {}
+    for term in field.split(','):
+        if term:
+            exponent, coefficient = term.split(':')
+            terms[int(exponent)] = int(coefficient)
+    return [terms.get(i, 0) for i in range(max(terms, default=-1) + 1)]
+
+class M2Session:
+    # one M2 process kept alive for any number of batches
+    # command is the process to run, the M2 executable found on the PATH by default (or STUB_COMMAND)
+    def __init__(self, command=None, script=SPECHT_FUNCTIONS):
+        if command is None:
+            executable = shutil.which('M2')
+            if executable is None:
+                raise M2Unavailable("Macaulay2 (M2) was not found on the PATH")
+            command = [executable] + M2_ARGS
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except OSError as e:
+            raise M2Unavailable(f"Could not start {command[0]}: {e}") from e
+
+        self._send(f'load "{script}";')
+        for line in PRELUDE.strip().split('\n'):
+            self._send(line)
+        self._send('pyDone();')
+        for _ in self._read_batch():
+            pass
+
+    def _send(self, line):
+        try:
+            self.process.stdin.write(line + '\n')
+            self.process.stdin.flush()
+        except BrokenPipeError as e:
+            raise RuntimeError("The M2 session exited unexpectedly") from e
+
+    # yields the RESULT and ERROR lines, split into fields, up to the next DONE
+    def _read_batch(self):
+        for line in self.process.stdout:
+            if line.startswith('DONE'):
+                return
+            if line.startswith(('RESULT ', 'ERROR ')):
+                yield line.rstrip('\n').split(' ')
+        raise RuntimeError("The M2 session exited unexpectedly")
+
+    # yields (partition, hilbert series of S / I_mu) for every partition, batch_size partitions per round trip
+    # the series are simplified, so they compare equal to specht_hilbert_series
+    def iter_hilbert_series(self, partitions, batch_size=50):
+        partitions = list(partitions)
+        for start in range(0, len(partitions), batch_size):
+            batch = partitions[start:start + batch_size]
+            for k, p in enumerate(batch):
+                self._send(f"pyHilbertSeries({k}, {{{', '.join(map(str, p.tparts))}}});")
+            self._send('pyDone();')
+            for fields in self._read_batch():
+                p = batch[int(fields[1])]
+                if fields[0] == 'ERROR':
+                    raise RuntimeError(f"M2 failed to compute the hilbert series of {p}")
+                coeffs = _parse_terms(fields[3] if len(fields) > 3 else '')
+                yield p, HilbExpr(coeffs, int(fields[2]), simplify=True)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write('exit 0\n')
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"M2Session({' '.join(self.process.args)!r})"
+
+# compares specht_hilbert_series with M2 on every partition and returns (number checked, mismatches), where the
+# mismatches are (partition, python series, M2 series) triples
+# raises M2Unavailable when no session is given and M2 is not installed
+def cross_validate(partitions, session=None, batch_size=50):
+    from specht_ideals import specht_hilbert_series
+    own_session = session is None
+    if own_session:
+        session = M2Session()
+    try:
+        checked = 0
+        mismatches = []
+        for p, theirs in session.iter_hilbert_series(partitions, batch_size):
+            ours = specht_hilbert_series(p)
+            checked += 1
+            if ours != theirs:
+                mismatches.append((p, ours, theirs))
+        return checked, mismatches
+    finally:
+        if own_session:
+            session.close()
+
+# stand-in for M2 used by STUB_COMMAND: answers the protocol above from specht_hilbert_series, written over
+# (1 - t)^n like the poincare series of M2, and ignores every other line
+def _serve_stub(stdin=sys.stdin, stdout=sys.stdout):
+    from specht_ideals import specht_hilbert_series
+    from expressions import _mul_one_minus_t
+    request = re.compile(r'pyHilbertSeries\((\d+), \{([\d, ]*)\}\);')
+    for line in stdin:
+        match = request.match(line.strip())
+        if match is not None:
+            p = Partition([int(x) for x in match.group(2).split(',') if x.strip()])
+            hs = specht_hilbert_series(p)
+            coeffs = _mul_one_minus_t(hs.coeffs, p.size - hs.a)
+            terms = ",".join(f"{i}:{c}" for i, c in enumerate(coeffs) if c != 0)
+            print(f"RESULT {match.group(1)} {p.size} {terms}", file=stdout, flush=True)
+        elif line.strip() == 'pyDone();':
+            print("DONE", file=stdout, flush=True)
+        elif line.strip().startswith('exit'):
+            return
+
+def main(argv=None):
+    from specht import parse_n
+    parser = argparse.ArgumentParser(description="Check specht_hilbert_series against Macaulay2")
+    parser.add_argument('--n', type=parse_n, default=range(2, 8), help="sizes of the partitions, i.e. 3..7 or 4,6")
+    parser.add_argument('--batch-size', type=int, default=50, help="partitions sent to M2 per round trip")
+    parser.add_argument('--stub', action='store_true', help="use the local stand-in instead of M2")
+    parser.add_argument('--serve-stub', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve_stub:
+        _serve_stub()
+        return 0
+
+    partitions = [p for n in args.n for p in Partitions.iter(n)]
+    try:
+        session = M2Session(STUB_COMMAND if args.stub else None)
+    except M2Unavailable as e:
+        print(f"{e}, skipping the cross-validation", file=sys.stderr)
+        return 0
+    with session:
+        checked, mismatches = cross_validate(partitions, session, args.batch_size)
+    for p, ours, theirs in mismatches:
+        print(f"MISMATCH {p}: python {ours}, M2 {theirs}", file=sys.stderr)
+    print(f"{checked} partitions checked, {len(mismatches)} mismatches", file=sys.stderr)
+    return 1 if len(mismatches) > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,22 +5,58 @@ File contains:
     class Partitions
     class LowerOrderIdeal
 '''
-import networkx as nx
-import matplotlib.pyplot as plt
+from collections import deque
+from itertools import zip_longest
+# networkx and matplotlib are only imported by the plotting methods, so the combinatorics loads without them
+
+# memo tables for the chipping sequence DAG, shared by all partitions
+_CHIPPING_STEPS = {}
+_CHIPPING_COUNTS = {}
+
+def clear_chipping_cache():
+    _CHIPPING_STEPS.clear()
+    _CHIPPING_COUNTS.clear()
 
 class Partition:
+    # partitions are immutable: the parts are stored once as a non-increasing tuple and the
+    # hash, size and corner set are cached on the object, so edits always build a new partition
+    __slots__ = ('tparts', '_hash', '_size', '_corners')
+
     # parts should be a list of positive numbers, i.e. [3, 2, 2, 1]
     def __init__(self, parts):
-        self.parts = list(parts)
-        self.parts.sort(reverse=True)
-        self.parts = [part for part in self.parts if part > 0]
-        self.tparts = tuple(self.parts)
+        self._set_parts(tuple(sorted((part for part in parts if part > 0), reverse=True)))
+
+    def _set_parts(self, tparts):
+        self.tparts = tparts
+        self._hash = hash(tparts)
+        self._size = sum(tparts)
+        self._corners = None
+
+    # builds a partition from a tuple that is already non-increasing with no zero parts, skipping the sort
+    @classmethod
+    def _from_sorted(cls, tparts):
+        new_partition = object.__new__(cls)
+        new_partition._set_parts(tparts)
+        return new_partition
+
+    def __reduce__(self):
+        return (Partition, (self.tparts,))
+
+    # list of the parts, kept for compatibility with code that used the old mutable attribute
+    @property
+    def parts(self):
+        return list(self.tparts)
+
+    # the number of boxes, i.e. the n that self is a partition of
+    @property
+    def size(self):
+        return self._size
 
     def __len__(self):
-        return len(self.parts)
+        return len(self.tparts)
     
     def __iter__(self):
-        return iter(self.parts)
+        return iter(self.tparts)
 
     # allows for accessing parts in an easier manner, i.e. p[1] will give first part of p
     # WARNING: p[len(p) + 1] will return 0, not an error
@@ -28,46 +64,54 @@ class Partition:
         if isinstance(k, int):
             if k < 1:
                 raise IndexError("Partition index out of range")
-            if k > len(self):
+            if k > len(self.tparts):
                 return 0
             else:
-                return self.parts[k - 1]
+                return self.tparts[k - 1]
         else:
             raise TypeError("Partition indices must be integers")
     
-    # this creates a copy of the partition with part updated (done to prevent breaking hashing behavior)
+    # this creates a new partition with part updated (partitions are immutable to keep hashing behavior)
+    # only the updated part can be out of order, so it is moved into place instead of re-sorting
     def update_part(self, k, value):
         if k < 1:
             raise IndexError("Partition index out of range")
         if value < 0:
             raise ValueError("Partition parts must be non-negative")
 
-        new_partition = self.copy()
+        parts = self.tparts
 
         # deals with case when part is 0
         if value == 0:
-            if self[k] == 0:
-                return new_partition
-            elif k == 1 and self == Partition([1]):
+            if k > len(parts):
+                return self
+            elif k == 1 and parts == (1,):
                 raise ValueError("Empty partition is not allowed")
             else:
-                del new_partition.parts[k - 1]
-                new_partition.parts.sort(reverse=True)
-                new_partition.tparts = tuple(new_partition.parts)
-                return new_partition
+                return Partition._from_sorted(parts[:k - 1] + parts[k:])
 
-        if k > len(self):
-            new_partition.parts.append(value)
+        if k > len(parts):
+            new_parts = list(parts)
+            new_parts.append(value)
+            i = len(parts)
         else:
-            new_partition.parts[k - 1] = value
-        new_partition.parts.sort(reverse=True)
-        new_partition.tparts = tuple(new_partition.parts)
-        return new_partition
+            new_parts = list(parts)
+            new_parts[k - 1] = value
+            i = k - 1
+
+        while i > 0 and new_parts[i - 1] < value:
+            new_parts[i] = new_parts[i - 1]
+            i -= 1
+        while i + 1 < len(new_parts) and new_parts[i + 1] > value:
+            new_parts[i] = new_parts[i + 1]
+            i += 1
+        new_parts[i] = value
+        return Partition._from_sorted(tuple(new_parts))
 
+    # partitions are immutable, so a copy can share the same object
     def copy(self):
-        return Partition(self.parts.copy())
+        return self
 
-    # creates a new partition where k-th part is increased by 1
     def add_to_part(self, k):
         return self.update_part(k, self[k] + 1)
     
@@ -80,42 +124,49 @@ class Partition:
     # returns the list of rows that have a corner
     # if self = [4, 2, 2, 2], corner_set returns [1, 4]
     def corner_set(self):
-        cs = []
-        for i in range(1, len(self) + 1):
-            if self[i] > self[i + 1]:
-                cs.append(i)
-        return cs
-
+        if self._corners is None:
+            parts = self.tparts
+            l = len(parts)
+            self._corners = tuple(i for i in range(1, l + 1) if i == l or parts[i - 1] > parts[i])
+        return list(self._corners)
+
+    # moves the boxes of rows k + 1, ..., m (the rows below k with the same length) down so that these rows have length
+    # self[k] - 1, filling the following rows up to self[k] - 1 in order, built directly in one pass over the parts
     def compress(self, k):
         if k > len(self) or k < 1:
             raise ValueError("Can only compress on non-zero row")
         if self[k] < 2:
             raise ValueError("Cannot compress on part of size 1")
             
-        compressed_partition = self.copy()
-        m = max(i for i in range(1, len(self) + 1) if self[i] == self[k])
+        parts = list(self.tparts)
+        value = parts[k - 1]
+        m = k
+        while m < len(parts) and parts[m] == value:
+            m += 1
         blocks_to_move = m - k
 
-        # we have to update the k + 1 part every time because this is where the part with size self[k] will be after reordering
-        for i in range(k + 1, m + 1):
-            compressed_partition = compressed_partition.update_part(k + 1, self[k] - 1)
+        for i in range(k, m):
+            parts[i] = value - 1
 
-        i = m + 1
+        i = m
         while blocks_to_move > 0:
-            compressed_partition = compressed_partition.update_part(i, min(self[k] - 1, self[i] + blocks_to_move))
-            blocks_to_move -= self[k] - 1 - self[i]
+            part = parts[i] if i < len(parts) else 0
+            new_part = min(value - 1, part + blocks_to_move)
+            if i < len(parts):
+                parts[i] = new_part
+            else:
+                parts.append(new_part)
+            blocks_to_move -= value - 1 - part
             i += 1
 
-        return compressed_partition
+        return Partition._from_sorted(tuple(parts))
         
     def dominates(self, other):
         s_sum = 0
         o_sum = 0
-        index = 1
-        while self[index] > 0 or other[index] > 0:
-            s_sum += self[index]
-            o_sum += other[index]
-            index += 1
+        for s_part, o_part in zip_longest(self.tparts, other.tparts, fillvalue=0):
+            s_sum += s_part
+            o_sum += o_part
             if o_sum < s_sum:
                 return False
         return True
@@ -138,10 +189,10 @@ class Partition:
                 meet_parts.append(m_part)
 
     def less_than_ideal(self):
-        return LowerOrderIdeal(sum(self), [self])
+        return LowerOrderIdeal(self.size, [self])
     
     def strictly_less_than_ideal(self):
-        return LowerOrderIdeal(sum(self), self.get_covered_partitions())
+        return LowerOrderIdeal(self.size, self.get_covered_partitions())
         
     def get_covered_partitions(self):
         covered_partitions = []
@@ -169,51 +220,96 @@ class Partition:
                         break
         return covered_partitions
 
-    def get_chipping_sequences(self):
+    # the partitions that can follow self in a chipping sequence, in the order the sequences are listed and with
+    # repeats when two chips lead to the same partition, memoized so shared sub-partitions are only expanded once
+    def chipping_steps(self):
+        steps = _CHIPPING_STEPS.get(self)
+        if steps is not None:
+            return steps
         if self[1] == 1:
-            return [[self]]
-        
-        sequences = []
-        for i in self.corner_set():
-            new_sequences = self.remove_from_part(i).get_chipping_sequences()
-            for seq in new_sequences:
-                sequences.append([self] + seq)
-        
-        first_corner = min(self.corner_set())
-        for i in range(1, len(self) + 1):
-            if self[i] == 1:
-                break
-            if i in self.corner_set():
+            steps = ()
+        else:
+            corners = self.corner_set()
+            steps = [self.remove_from_part(i) for i in corners]
+            first_corner = corners[0]
+            for i in range(1, len(self) + 1):
+                if self[i] == 1:
+                    break
+                if i in corners:
+                    continue
+
+                ith_compression = self.compress(i)
+                steps.append(ith_compression.remove_from_part(i))
+                if i >= first_corner:
+                    ci = max(j for j in corners if j <= i)
+                    steps.append(ith_compression.remove_from_part(ci))
+            steps = tuple(steps)
+        _CHIPPING_STEPS[self] = steps
+        return steps
+
+    # number of chipping sequences starting at self, keyed by the size of their final partition (memoized)
+    def chipping_sequence_counts(self):
+        counts = _CHIPPING_COUNTS.get(self)
+        if counts is not None:
+            return counts
+        if self[1] == 1:
+            counts = {self.size: 1}
+        else:
+            counts = {}
+            for p in self.chipping_steps():
+                for size, count in p.chipping_sequence_counts().items():
+                    counts[size] = counts.get(size, 0) + count
+        _CHIPPING_COUNTS[self] = counts
+        return counts
+
+    # counts the chipping sequences without listing them, optionally only those ending in a partition of end_size
+    def count_chipping_sequences(self, end_size=None):
+        counts = self.chipping_sequence_counts()
+        if end_size is None:
+            return sum(counts.values())
+        return counts.get(end_size, 0)
+
+    # lazily yields the chipping sequences in the same order as get_chipping_sequences
+    # with end_size, only sequences ending in a partition of that size are walked
+    def iter_chipping_sequences(self, end_size=None):
+        if end_size is not None and end_size not in self.chipping_sequence_counts():
+            return
+        if self[1] == 1:
+            yield [self]
+            return
+
+        path = [self]
+        stack = [iter(self.chipping_steps())]
+        while len(stack) != 0:
+            p = next(stack[-1], None)
+            if p is None:
+                stack.pop()
+                path.pop()
+            elif end_size is not None and end_size not in p.chipping_sequence_counts():
                 continue
+            elif p[1] == 1:
+                yield path + [p]
+            else:
+                path.append(p)
+                stack.append(iter(p.chipping_steps()))
 
-            ith_compression = self.compress(i)
-            new_sequences = ith_compression.remove_from_part(i).get_chipping_sequences()
-            for seq in new_sequences:
-                sequences.append([self] + seq)
-
-            if i >= first_corner:
-                ci = max(j for j in self.corner_set() if j <= i)
-                new_sequences = ith_compression.remove_from_part(ci).get_chipping_sequences()
-                for seq in new_sequences:
-                    sequences.append([self] + seq)
-
-        return sequences
+    def get_chipping_sequences(self):
+        return list(self.iter_chipping_sequences())
     
     def get_sorted_chipping_sequences(self):
-        sequences = self.get_chipping_sequences()
         sorted_sequences = {}
-        for seq in sequences:
-            end_partition = seq[-1]
-            if sum(end_partition) not in sorted_sequences:
-                sorted_sequences[sum(end_partition)] = [seq]
-            else:
-                sorted_sequences[sum(end_partition)].append(seq)
-
+        for seq in self.iter_chipping_sequences():
+            sorted_sequences.setdefault(seq[-1].size, []).append(seq)
         return sorted_sequences
 
+    # the chipping sequences keyed by the size of their final partition, as one single-use lazy iterator per size, so
+    # the sequences can be bucketed without storing them
+    def iter_sorted_chipping_sequences(self):
+        return {size: self.iter_chipping_sequences(end_size=size) for size in self.chipping_sequence_counts()}
+
     # allows for use of Partitions in sets and dicts
     def __hash__(self):
-        return hash(self.tparts)
+        return self._hash
         
     def __eq__(self, other):
         if not isinstance(other, Partition):
@@ -239,11 +335,13 @@ class Partition:
         return f"{self.tparts}"
     
     def get_young_diagram(self, ax, x_offset = 0, y_offset = 0):
+        import matplotlib.pyplot as plt
         for i in range(1, len(self) + 1):
             for j in range(1, self[i] + 1):
                 ax.add_patch(plt.Rectangle((x_offset + j, -i - y_offset), 1, 1, fill=False))
     
     def show_young_diagram(self):
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots()
         fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
         self.get_young_diagram(ax)
@@ -254,12 +352,13 @@ class Partition:
         plt.show()
 
     def show_chipping_sequences(self):
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(10, 10))
         fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
 
         x_offset = 0
         y_offset = 0
-        cs = self.get_sorted_chipping_sequences()
+        cs = self.iter_sorted_chipping_sequences()
 
         for i in sorted(list(cs.keys()), reverse=True):
             for seq in cs[i]:
@@ -274,43 +373,62 @@ class Partition:
         ax.autoscale_view()
         ax.axis('off')
         plt.show()
+
+    # headless versions of the two above, writing straight to a .svg or .png file (see render.py)
+    def save_young_diagram(self, path, scale=20):
+        import render
+        render.save_young_diagram(self, path, scale)
+
+    def save_chipping_sequences(self, path, scale=20):
+        import render
+        render.save_chipping_sequences(self, path, scale)
     
 ### ------------------------------------------------------------------------ ###
 
 class PartitionSet:
+    # partitions are stored in a dict keyed on Partition.tparts, which keeps insertion order
+    # and gives constant time membership, insertion and removal
     def __init__(self, partitions=None):
         if partitions is None:
             partitions = []
         self.partitions = partitions
 
+    @property
+    def partitions(self):
+        return list(self._index.values())
+
+    @partitions.setter
+    def partitions(self, partitions):
+        self._index = {}
+        for p in partitions:
+            self._index.setdefault(p.tparts, p)
+
     def __len__(self):
-        return len(self.partitions)
+        return len(self._index)
     
     def __iter__(self):
-        return iter(self.partitions)
+        return iter(self._index.values())
+
+    def __contains__(self, p):
+        if not isinstance(p, Partition):
+            p = Partition(p)
+        return p.tparts in self._index
         
     def get_partition(self, p):
         if not isinstance(p, Partition):
             p = Partition(p)
-        for p1 in self:
-            if p1 == p:
-                return p1
-        return False
+        return self._index.get(p.tparts, False)
         
     def add_partition(self, p):
-        if not self.get_partition(p):
-            self.partitions.append(p)
-            return True
-        else:
+        if p.tparts in self._index:
             return False
+        self._index[p.tparts] = p
+        return True
             
     def remove_partition(self, p):
-        p1 = self.get_partition(p)
-        if not p1:
-            return False
-        else:
-            self.partitions.remove(p1)
-            return True
+        if not isinstance(p, Partition):
+            p = Partition(p)
+        return self._index.pop(p.tparts, None) is not None
 
     def __repr__(self):
         return f"Set of {len(self)} partitions: {self.partitions}"
@@ -329,6 +447,81 @@ class Partitions(PartitionSet):
         self.ranks = {} # dict holding poset ranks to help generate the Hasse diagram
         self.generate_partitions()
 
+    # lazily yields the partitions of n one at a time, without building the poset or storing earlier partitions
+    # order='revlex' starts at (n) and is a linear extension of the dominance order (a partition comes before every
+    # partition it dominates), order='lex' starts at (1, ..., 1) and is its reverse
+    # max_length and max_part bound the partitions, and dominated_by only yields partitions p with p <= dominated_by
+    @staticmethod
+    def iter(n, order='revlex', max_length=None, max_part=None, dominated_by=None):
+        if n < 1:
+            raise ValueError("In PartitionSet, n must be a positive integer")
+        if order not in ('revlex', 'lex'):
+            raise ValueError("order must be 'revlex' or 'lex'")
+
+        m = n if max_part is None else min(n, max_part)
+        if dominated_by is not None:
+            if dominated_by.size != n:
+                raise ValueError("dominated_by must be a partition of n = " + str(n))
+            # p <= dominated_by forces p[1] <= dominated_by[1]
+            m = min(m, dominated_by[1])
+        if m < 1:
+            return
+
+        steps = Partitions._revlex_steps(n, m) if order == 'revlex' else Partitions._lex_steps(n, m)
+        for parts in steps:
+            if max_length is not None and len(parts) > max_length:
+                # in reverse lexicographic order the first part only decreases, so once it is too small to fit n
+                # into max_length rows no later partition is short enough
+                if order == 'revlex' and parts[0] * max_length < n:
+                    return
+                continue
+            p = Partition._from_sorted(tuple(parts))
+            if dominated_by is None or p <= dominated_by:
+                yield p
+
+    # partitions of n with parts at most m in reverse lexicographic order, as the same list updated in place
+    # the last part bigger than 1 is decreased and the boxes after it refilled greedily
+    @staticmethod
+    def _revlex_steps(n, m):
+        q, r = divmod(n, m)
+        parts = [m] * q + ([r] if r > 0 else [])
+        yield parts
+        while parts[0] > 1:
+            ones = 0
+            while parts[-1] == 1:
+                parts.pop()
+                ones += 1
+            x = parts[-1] - 1
+            parts[-1] = x
+            remaining = ones + 1
+            while remaining > x:
+                parts.append(x)
+                remaining -= x
+            if remaining > 0:
+                parts.append(remaining)
+            yield parts
+
+    # partitions of n with parts at most m in lexicographic order, as the same list updated in place
+    # the last part that can grow by 1 takes a box from the parts after it, which are then reset to 1s
+    @staticmethod
+    def _lex_steps(n, m):
+        parts = [1] * n
+        yield parts
+        while True:
+            tail = 0
+            i = len(parts) - 1
+            while i >= 0:
+                if tail > 0 and parts[i] < m and (i == 0 or parts[i - 1] > parts[i]):
+                    break
+                tail += parts[i]
+                i -= 1
+            if i < 0:
+                return
+            parts[i] += 1
+            del parts[i + 1:]
+            parts.extend([1] * (tail - 1))
+            yield parts
+
     def generate_partitions(self):
         max_partition = Partition([self.n])
         self.add_partition(max_partition)
@@ -358,12 +551,14 @@ class Partitions(PartitionSet):
         
     def get_cover_relations(self):
         relations = []
-        for p in self.partitions:
+        for p in self:
             for p1 in self.covers[p]:
                 relations.append((p1, p))
         return relations
 
     def show_hasse_diagram(self, width=10, height=20):
+        import networkx as nx
+        import matplotlib.pyplot as plt
         G = nx.DiGraph()
         G.add_nodes_from(self.partitions)
         G.add_edges_from(self.get_cover_relations())
@@ -394,8 +589,15 @@ class Partitions(PartitionSet):
         plt.axis('off')
         plt.show()
 
+    # writes the Hasse diagram to a .dot, .svg or .png file without opening a window, in time linear in the number
+    # of partitions and cover relations (see render.py)
+    # labels defaults to True for up to render.MAX_LABELED_NODES partitions
+    def save_hasse_diagram(self, path, labels=None):
+        import render
+        render.save_hasse_diagram(self, path, labels)
+
     def __repr__(self):
-        return f"Partitions({self.n}) with {len(self.partitions)} partitions"
+        return f"Partitions({self.n}) with {len(self)} partitions"
         
 ### ------------------------------------------------------------------------ ###
 
@@ -418,7 +620,7 @@ class LowerOrderIdeal(PartitionSet):
     
     # add partition and all lower partitions
     def add_partition_to_ideal(self, p):
-        if sum(p) != self.n:
+        if p.size != self.n:
                 raise ValueError("All partitions of the ideal must be partitions of n = " + str(self.n))
         
         success = self.add_partition(p)
@@ -432,32 +634,43 @@ class LowerOrderIdeal(PartitionSet):
             for g in unnec_gens:
                 self.generators.remove(g)
 
-            partitions_to_add = p.get_covered_partitions()
+            partitions_to_add = deque(p.get_covered_partitions())
         else:
             return False
         
         while len(partitions_to_add) > 0:
-            p_to_add = partitions_to_add[0]
+            p_to_add = partitions_to_add.popleft()
             success = self.add_partition(p_to_add)
             if success:
                 covered_partitions = p_to_add.get_covered_partitions()
                 partitions_to_add.extend(covered_partitions)
-            partitions_to_add.pop(0)
         return True
 
+    # canonical hashable key of the ideal: equal ideals of P_n have the same minimal generating set
+    def key(self):
+        return (self.n, frozenset(g.tparts for g in self.generators))
+
     # returns the lower order ideal of P_{n - 1} of all partitions that are in I after adding 1 to the k-th part
+    # p.add_to_part(k) is a partition q of I with a box removed from a corner row r <= k, where rows r + 1, ..., k of q
+    # all have length q[r] - 1, so the candidates are read off the partitions of I instead of building all of P_{n - 1}
     def smaller_ideal(self, k):
-        P = Partitions(self.n - 1)
         I = LowerOrderIdeal(self.n - 1)
-        
-        for p in P.partitions:
-            for g in self.generators:
-                if p.add_to_part(k) <= g:
-                    I.add_partition_to_ideal(p)
+
+        candidates = set()
+        for q in self:
+            for r in q.corner_set():
+                if r > k:
                     break
+                if r == k or (q[r + 1] == q[r] - 1 and q[k] == q[r] - 1):
+                    candidates.add(q.remove_from_part(r))
+
+        # reverse lexicographic order is a linear extension of the dominance order, so a candidate that is not
+        # already in I when it is reached is maximal, and the ideal is closed from its generators only
+        for p in sorted(candidates, key=lambda p: p.tparts, reverse=True):
+            I.add_partition_to_ideal(p)
         return I
 
     def __repr__(self):
-        return f"Lower order ideal of {len(self.partitions)} partitions of {self.n}\nGenerated by {self.generators}"
+        return f"Lower order ideal of {len(self)} partitions of {self.n}\nGenerated by {self.generators}"
     
 ### ------------------------------------------------------------------------ ###
@@ -0,0 +1,222 @@
+'''
+File contains:
+    class DominancePoset
+    class BitsetIdeal
+'''
+import numpy as np
+from partitions import Partition, Partitions, LowerOrderIdeal
+
+class DominancePoset:
+    # compact array form of the dominance order on the partitions of n
+    # partitions get integer ids in reverse lexicographic order, which is a linear extension of the dominance order,
+    # so every partition has a smaller id than the partitions it dominates
+    # prefix_sums[i, j] is the sum of the first j + 1 parts of partition i (padded with zeros to n columns), so
+    # partition i is dominated by partition j exactly when prefix_sums[i] <= prefix_sums[j] in every column
+    # the covering relations are stored CSR style: partition i covers cover_indices[cover_indptr[i]:cover_indptr[i + 1]]
+    # and cover_rows[e] is the partition covering the other end of edge e
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError("In PartitionSet, n must be a positive integer")
+        self.n = n
+        self.partitions = list(Partitions.iter(n))
+        self.ids = {p: i for i, p in enumerate(self.partitions)}
+
+        parts = np.zeros((len(self.partitions), n), dtype=np.min_scalar_type(n))
+        for i, p in enumerate(self.partitions):
+            parts[i, :len(p)] = p.tparts
+        self.prefix_sums = np.cumsum(parts, axis=1, dtype=parts.dtype)
+
+        indptr = [0]
+        indices = []
+        for p in self.partitions:
+            indices.extend(self.ids[q] for q in p.get_covered_partitions())
+            indptr.append(len(indices))
+        self.cover_indptr = np.array(indptr, dtype=np.int64)
+        self.cover_indices = np.array(indices, dtype=np.int64)
+        self.cover_rows = np.repeat(np.arange(len(self.partitions), dtype=np.int64), np.diff(self.cover_indptr))
+        self._covered_by = None
+        self._ranks = None
+        self._lower_bits = {}
+
+    def __len__(self):
+        return len(self.partitions)
+
+    # id of a partition (or of a list of parts)
+    def index(self, p):
+        if not isinstance(p, Partition):
+            p = Partition(p)
+        return self.ids[p]
+
+    def _id(self, p):
+        return p if isinstance(p, (int, np.integer)) else self.index(p)
+
+    # p <= q in the dominance order, for partitions or ids
+    def leq(self, p, q):
+        return bool(np.all(self.prefix_sums[self._id(p)] <= self.prefix_sums[self._id(q)]))
+
+    # boolean mask of all partitions dominated by p, i.e. the principal lower order ideal of p
+    def lower_mask(self, p):
+        return np.all(self.prefix_sums <= self.prefix_sums[self._id(p)], axis=1)
+
+    # boolean mask of all partitions that dominate p
+    def upper_mask(self, p):
+        return np.all(self.prefix_sums >= self.prefix_sums[self._id(p)], axis=1)
+
+    # boolean mask of the lower order ideal generated by the given partitions or ids
+    def ideal_mask(self, generators):
+        mask = np.zeros(len(self), dtype=bool)
+        for g in generators:
+            mask |= self.lower_mask(g)
+        return mask
+
+    # conversions between boolean masks over the ids and Python int bitsets (bit i is partition i)
+    def mask_to_bits(self, mask):
+        return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+    def bits_to_mask(self, bits):
+        data = np.frombuffer(bits.to_bytes((len(self) + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:len(self)].astype(bool)
+
+    # bitset of the principal lower order ideal of p, cached per partition
+    def lower_bits(self, p):
+        i = self._id(p)
+        if i not in self._lower_bits:
+            self._lower_bits[i] = self.mask_to_bits(self.lower_mask(i))
+        return self._lower_bits[i]
+
+    def partitions_in(self, mask):
+        return [self.partitions[i] for i in np.flatnonzero(mask)]
+
+    def principal_ideal(self, p):
+        return self.partitions_in(self.lower_mask(p))
+
+    def upper_set(self, p):
+        return self.partitions_in(self.upper_mask(p))
+
+    # ids of the partitions covered by p
+    def covers(self, p):
+        i = self._id(p)
+        return self.cover_indices[self.cover_indptr[i]:self.cover_indptr[i + 1]]
+
+    # ids of the partitions covering p, from the transposed CSR arrays built on first use
+    def covered_by(self, p):
+        if self._covered_by is None:
+            order = np.argsort(self.cover_indices, kind='stable')
+            counts = np.bincount(self.cover_indices, minlength=len(self))
+            indptr = np.concatenate(([0], np.cumsum(counts)))
+            self._covered_by = (indptr, self.cover_rows[order])
+        indptr, indices = self._covered_by
+        i = self._id(p)
+        return indices[indptr[i]:indptr[i + 1]]
+
+    # ranks as in Partitions: the length of the longest chain down from (n)
+    def ranks(self):
+        if self._ranks is None:
+            ranks = np.zeros(len(self), dtype=np.int64)
+            # ids are a linear extension, so every partition is final before the partitions it covers are reached
+            for i in range(len(self)):
+                covered = self.cover_indices[self.cover_indptr[i]:self.cover_indptr[i + 1]]
+                np.maximum.at(ranks, covered, ranks[i] + 1)
+            self._ranks = ranks
+        return self._ranks
+
+    # the covers, covered_by and ranks dicts of Partitions(n), keyed by partition
+    def to_dicts(self):
+        ranks = self.ranks()
+        covers = {}
+        covered_by = {}
+        ranks_dict = {}
+        for i, p in enumerate(self.partitions):
+            covers[p] = [self.partitions[j] for j in self.covers(i)]
+            covered_by[p] = [self.partitions[j] for j in self.covered_by(i)]
+            ranks_dict[p] = int(ranks[i])
+        return covers, covered_by, ranks_dict
+
+    def __repr__(self):
+        return f"DominancePoset({self.n}) with {len(self)} partitions"
+
+### ------------------------------------------------------------------------ ###
+
+class BitsetIdeal:
+    # lower order ideal of P_n as a Python int bitset over the ids of a DominancePoset (bit i is set when partition i
+    # is in the ideal), so union, intersection, containment and equality are single big integer operations
+    def __init__(self, poset, bits=0):
+        self.poset = poset
+        self.bits = bits
+
+    @classmethod
+    def from_generators(cls, poset, generators):
+        bits = 0
+        for g in generators:
+            bits |= poset.lower_bits(g)
+        return cls(poset, bits)
+
+    @classmethod
+    def from_ideal(cls, poset, L):
+        if L.n != poset.n:
+            raise ValueError("The ideal and the poset must be on partitions of the same n")
+        return cls.from_generators(poset, L.generators)
+
+    # the ideal of partitions dominated by p, or strictly dominated by p when strict is True
+    @classmethod
+    def principal(cls, poset, p, strict=False):
+        bits = poset.lower_bits(p)
+        if strict:
+            bits &= ~(1 << poset._id(p))
+        return cls(poset, bits)
+
+    def to_ideal(self):
+        return LowerOrderIdeal(self.poset.n, self.generators())
+
+    def _check(self, other):
+        if not isinstance(other, BitsetIdeal):
+            raise TypeError("Can only combine a BitsetIdeal with another BitsetIdeal")
+        if other.poset is not self.poset:
+            raise ValueError("Bitset ideals must share the same DominancePoset")
+        return other
+
+    def __or__(self, other):
+        other = self._check(other)
+        return BitsetIdeal(self.poset, self.bits | other.bits)
+
+    def __and__(self, other):
+        other = self._check(other)
+        return BitsetIdeal(self.poset, self.bits & other.bits)
+
+    # containment of ideals
+    def __le__(self, other):
+        other = self._check(other)
+        return self.bits & ~other.bits == 0
+
+    def __ge__(self, other):
+        other = self._check(other)
+        return other.bits & ~self.bits == 0
+
+    def __eq__(self, other):
+        if not isinstance(other, BitsetIdeal):
+            return False
+        return self.poset is other.poset and self.bits == other.bits
+
+    def __hash__(self):
+        return hash((self.poset.n, self.bits))
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __contains__(self, p):
+        return (self.bits >> self.poset._id(p)) & 1 == 1
+
+    def __iter__(self):
+        return iter(self.poset.partitions_in(self.poset.bits_to_mask(self.bits)))
+
+    # maximal elements of the ideal: an element is not maximal exactly when a partition of the ideal covers it,
+    # so the non-maximal set is one scatter of the cover edges leaving the ideal
+    def generators(self):
+        poset = self.poset
+        mask = poset.bits_to_mask(self.bits)
+        covered = np.zeros(len(poset), dtype=bool)
+        covered[poset.cover_indices[mask[poset.cover_rows]]] = True
+        return poset.partitions_in(mask & ~covered)
+
+    def __repr__(self):
+        return f"Bitset ideal of {len(self)} partitions of {self.poset.n}"
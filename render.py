@@ -0,0 +1,219 @@
+'''
+Headless rendering of Hasse diagrams, Young diagrams and chipping sequences to DOT, SVG and PNG files.
+
+Everything is laid out in one pass over the nodes and edges. Young diagrams are drawn as their grid lines (rows + columns
+segments per diagram) instead of one rectangle per box, and PNG files go through a single matplotlib LineCollection on
+the Agg canvas, so no windows are opened and the cost stays linear in the size of the picture.
+
+File contains:
+    def hasse_layout
+    def hasse_dot
+    def hasse_svg
+    def write_hasse_png
+    def save_hasse_diagram
+    def young_diagram_segments
+    def chipping_sequence_segments
+    def segments_svg
+    def write_segments_png
+    def save_young_diagram
+    def save_chipping_sequences
+'''
+import os
+
+# labels are only drawn by default up to this many nodes
+MAX_LABELED_NODES = 500
+
+def _label(p):
+    return ",".join(map(str, p.tparts))
+
+def _format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in ('dot', 'svg', 'png'):
+        raise ValueError("The file name must end in .dot, .svg or .png")
+    return extension
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+### ------------------------------------------------------------------------ ###
+# Hasse diagrams of Partitions(n)
+
+# positions {partition: (x, rank)} with every rank centered at x = 0 and consecutive nodes one unit apart
+def hasse_layout(P):
+    levels = {}
+    for p in P:
+        levels.setdefault(P.ranks[p], []).append(p)
+    pos = {}
+    for rank, level in levels.items():
+        for i, p in enumerate(level):
+            pos[p] = (i - (len(level) - 1) / 2, rank)
+    return pos
+
+def hasse_dot(P):
+    lines = [f"graph P_{P.n} {{", "    node [shape=box, style=rounded];"]
+    levels = {}
+    for p in P:
+        levels.setdefault(P.ranks[p], []).append(p)
+        lines.append(f'    "{_label(p)}";')
+    for rank in sorted(levels):
+        lines.append("    { rank=same; " + " ".join(f'"{_label(p)}";' for p in levels[rank]) + " }")
+    for p1, p in P.get_cover_relations():
+        lines.append(f'    "{_label(p)}" -- "{_label(p1)}";')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+# pixel scale of the layout: nodes are spaced by their longest label
+def _hasse_scale(P, labels):
+    if labels:
+        return max(40, 8 * max(len(_label(p)) for p in P) + 12), 60
+    return 12, 30
+
+def hasse_svg(P, labels=None):
+    if labels is None:
+        labels = len(P) <= MAX_LABELED_NODES
+    pos = hasse_layout(P)
+    sx, sy = _hasse_scale(P, labels)
+    x_min = min(x for x, _ in pos.values())
+    width = int((max(x for x, _ in pos.values()) - x_min) * sx) + 2 * sx
+    height = int(max(y for _, y in pos.values()) * sy) + 2 * sy
+    point = {p: ((x - x_min) * sx + sx, y * sy + sy) for p, (x, y) in pos.items()}
+
+    edges = " ".join(f"M{point[p][0]:.1f} {point[p][1]:.1f}L{point[p1][0]:.1f} {point[p1][1]:.1f}"
+                     for p1, p in P.get_cover_relations())
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">',
+             f'<path d="{edges}" stroke="gray" stroke-width="1" fill="none"/>']
+    if labels:
+        parts.append('<g font-family="sans-serif" font-size="12" text-anchor="middle" dominant-baseline="central">')
+        for p, (x, y) in point.items():
+            w = 8 * len(_label(p)) + 8
+            parts.append(f'<rect x="{x - w / 2:.1f}" y="{y - 10:.1f}" width="{w}" height="20" rx="6" '
+                         f'fill="lightblue"/><text x="{x:.1f}" y="{y:.1f}">{_label(p)}</text>')
+        parts.append('</g>')
+    else:
+        parts.append('<g fill="steelblue">')
+        parts.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3"/>' for x, y in point.values())
+        parts.append('</g>')
+    parts.append('</svg>')
+    return "\n".join(parts) + "\n"
+
+def write_hasse_png(P, path, labels=None, dpi=100):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    if labels is None:
+        labels = len(P) <= MAX_LABELED_NODES
+    pos = hasse_layout(P)
+    sx, sy = _hasse_scale(P, labels)
+    # flip the ranks so (n) is on top
+    point = {p: (x * sx, -y * sy) for p, (x, y) in pos.items()}
+    xs = [x for x, _ in point.values()]
+    ys = [y for _, y in point.values()]
+
+    fig = Figure(figsize=((max(xs) - min(xs) + 2 * sx) / dpi, (max(ys) - min(ys) + 2 * sy) / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.add_collection(LineCollection([(point[p], point[p1]) for p1, p in P.get_cover_relations()],
+                                     colors='gray', linewidths=0.5, zorder=1))
+    if labels:
+        for p, (x, y) in point.items():
+            ax.text(x, y, _label(p), ha='center', va='center', fontsize=8,
+                    bbox={'boxstyle': 'round', 'facecolor': 'lightblue', 'edgecolor': 'none'})
+    else:
+        ax.scatter(xs, ys, s=4, c='steelblue', zorder=2)
+    ax.set_xlim(min(xs) - sx, max(xs) + sx)
+    ax.set_ylim(min(ys) - sy, max(ys) + sy)
+    ax.axis('off')
+    fig.savefig(path, dpi=dpi)
+
+# writes the Hasse diagram of P to a .dot, .svg or .png file
+def save_hasse_diagram(P, path, labels=None):
+    extension = _format(path)
+    if extension == 'dot':
+        _write(path, hasse_dot(P))
+    elif extension == 'svg':
+        _write(path, hasse_svg(P, labels))
+    else:
+        write_hasse_png(P, path, labels)
+
+### ------------------------------------------------------------------------ ###
+# Young diagrams and chipping sequences, as line segments ((x0, y0), (x1, y1)) in box units with y pointing up
+
+# grid lines of the Young diagram of p, in the same coordinates as Partition.get_young_diagram: box (i, j) is the
+# unit square with lower left corner (x_offset + j, -i - y_offset)
+def young_diagram_segments(p, x_offset=0, y_offset=0):
+    left = x_offset + 1
+    top = -y_offset
+    segments = [((left, top), (left + p[1], top))]
+    for i in range(1, len(p) + 1):
+        segments.append(((left, top - i), (left + p[i], top - i)))
+    segments.append(((left, top), (left, top - len(p))))
+    height = len(p)
+    for j in range(1, p[1] + 1):
+        while p[height] < j:
+            height -= 1
+        segments.append(((left + j, top), (left + j, top - height)))
+    return segments
+
+# chipping sequences of mu laid out as in Partition.show_chipping_sequences: one sequence per line, sorted by the
+# size of the last partition, largest first
+def chipping_sequence_segments(mu):
+    segments = []
+    y_offset = 0
+    cs = mu.iter_sorted_chipping_sequences()
+    for size in sorted(cs, reverse=True):
+        for seq in cs[size]:
+            x_offset = 0
+            for p in seq:
+                segments.extend(young_diagram_segments(p, x_offset, y_offset))
+                x_offset += max(p) + 2
+            y_offset += max(len(p) for p in seq) + 2
+    return segments
+
+def _bounds(segments):
+    xs = [x for segment in segments for x, _ in segment]
+    ys = [y for segment in segments for _, y in segment]
+    return min(xs), max(xs), min(ys), max(ys)
+
+# all segments as one SVG path, scale pixels per box
+def segments_svg(segments, scale=20):
+    x_min, x_max, y_min, y_max = _bounds(segments)
+    width = int((x_max - x_min) * scale) + 2
+    height = int((y_max - y_min) * scale) + 2
+    d = " ".join(f"M{(x0 - x_min) * scale + 1} {(y_max - y0) * scale + 1}L{(x1 - x_min) * scale + 1} {(y_max - y1) * scale + 1}"
+                 for (x0, y0), (x1, y1) in segments)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}">\n<path d="{d}" stroke="black" stroke-width="1" fill="none"/>\n</svg>\n')
+
+def write_segments_png(segments, path, scale=20, dpi=100):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    x_min, x_max, y_min, y_max = _bounds(segments)
+    fig = Figure(figsize=(((x_max - x_min) * scale + 2) / dpi, ((y_max - y_min) * scale + 2) / dpi), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.add_collection(LineCollection(segments, colors='black', linewidths=0.8))
+    ax.set_xlim(x_min - 0.05, x_max + 0.05)
+    ax.set_ylim(y_min - 0.05, y_max + 0.05)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    fig.savefig(path, dpi=dpi)
+
+def _save_segments(segments, path, scale):
+    extension = _format(path)
+    if extension == 'dot':
+        raise ValueError("Young diagrams can only be written to .svg or .png files")
+    if extension == 'svg':
+        _write(path, segments_svg(segments, scale))
+    else:
+        write_segments_png(segments, path, scale)
+
+# writes the Young diagram of p to a .svg or .png file
+def save_young_diagram(p, path, scale=20):
+    _save_segments(young_diagram_segments(p), path, scale)
+
+# writes the chipping sequences of mu to a .svg or .png file
+def save_chipping_sequences(mu, path, scale=20):
+    _save_segments(chipping_sequence_segments(mu), path, scale)
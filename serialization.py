@@ -0,0 +1,148 @@
+'''
+File contains:
+    def encode
+    def decode
+    def dumps
+    def loads
+    def read_metadata
+    def dump
+    def load
+    def encode_many
+    def decode_many
+'''
+import gc
+import json
+from contextlib import contextmanager
+from partitions import Partition, LowerOrderIdeal
+from expressions import HilbExpr
+
+# compact JSON-lines format for results
+# a file starts with the header line {"format": "specht-results", "version": 1} (with any extra metadata keys, i.e.
+# the "kind" of a sweep, see specht.py) and then has one record per line,
+# where every record is a JSON array whose first entry is its type:
+#     ["P", parts]                    Partition, parts non-increasing
+#     ["L", n, [parts, ...]]          LowerOrderIdeal of P_n, by its generators
+#     ["K", n, [parts, ...]]          LowerOrderIdeal.key() tuple
+#     ["H", a, coeffs]                HilbExpr h(t) / (1 - t)^a, coefficients lowest degree first
+#     ["R", key record, value record] (key, value) pair, i.e. a result of batch_hilbert_series
+# series are stored as their native coefficient lists, so loading them never goes through SymPy
+FORMAT = 'specht-results'
+FORMAT_VERSION = 1
+
+def _sorted_generators(generators):
+    return sorted((list(g) for g in generators), reverse=True)
+
+# JSON-ready record of a Partition, LowerOrderIdeal, ideal key, HilbExpr or (key, value) pair
+def encode(obj):
+    if isinstance(obj, HilbExpr):
+        return ['H', obj.a, obj.coeffs]
+    if isinstance(obj, Partition):
+        return ['P', list(obj.tparts)]
+    if isinstance(obj, LowerOrderIdeal):
+        return ['L', obj.n, _sorted_generators(g.tparts for g in obj.generators)]
+    if isinstance(obj, tuple) and len(obj) == 2:
+        if isinstance(obj[1], frozenset):
+            return ['K', obj[0], _sorted_generators(obj[1])]
+        return ['R', encode(obj[0]), encode(obj[1])]
+    raise TypeError(f"Cannot serialize an object of type {type(obj).__name__}")
+
+def _decode_series(record):
+    return HilbExpr._from_coeffs(record[2], record[1])
+
+def _decode_partition(record):
+    return Partition._from_sorted(tuple(record[1]))
+
+def _decode_ideal(record):
+    return LowerOrderIdeal(record[1], [Partition._from_sorted(tuple(g)) for g in record[2]])
+
+def _decode_key(record):
+    return (record[1], frozenset(tuple(g) for g in record[2]))
+
+def _decode_pair(record):
+    return (decode(record[1]), decode(record[2]))
+
+_DECODERS = {
+    'H': _decode_series,
+    'P': _decode_partition,
+    'L': _decode_ideal,
+    'K': _decode_key,
+    'R': _decode_pair,
+}
+
+# inverse of encode
+def decode(record):
+    decoder = _DECODERS.get(record[0])
+    if decoder is None:
+        raise ValueError(f"Unknown record type {record[0]!r}")
+    return decoder(record)
+
+# one record as a single line of JSON (without the newline)
+def dumps(obj):
+    return json.dumps(encode(obj), separators=(',', ':'))
+
+def loads(line):
+    return decode(json.loads(line))
+
+def _header(metadata=None):
+    return json.dumps({'format': FORMAT, 'version': FORMAT_VERSION, **(metadata or {})})
+
+# the header as a dict, including its metadata
+def _check_header(line):
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ValueError("Not a " + FORMAT + " file")
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported {FORMAT} version {header.get('version')}, expected {FORMAT_VERSION}")
+    return header
+
+# metadata of the header line of a file, as a dict without the format and version keys
+def read_metadata(line):
+    header = _check_header(line)
+    return {key: value for key, value in header.items() if key not in ('format', 'version')}
+
+# writes the header and one line per object to an open text file
+# with header=False only the records are written, i.e. to append to an existing file
+# metadata is an optional dict of extra header keys
+def dump(objects, f, header=True, metadata=None):
+    if header:
+        f.write(_header(metadata) + '\n')
+    for obj in objects:
+        f.write(dumps(obj) + '\n')
+
+# yields the objects of an open text file written by dump, one line at a time
+def load(f):
+    first = True
+    for line in f:
+        if first:
+            _check_header(line)
+            first = False
+        elif line.strip():
+            yield loads(line)
+
+# whole file contents for a list of objects
+def encode_many(objects):
+    return '\n'.join([_header()] + [dumps(obj) for obj in objects]) + '\n'
+
+# parsing creates millions of small lists, and every collection in between would rescan all of them
+@contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+# inverse of encode_many
+# all records are parsed by a single json.loads call with the garbage collector paused, which is an order of
+# magnitude faster than load for large files
+def decode_many(text):
+    header, _, body = text.partition('\n')
+    _check_header(header)
+    lines = [line for line in body.split('\n') if line.strip()]
+    with _gc_paused():
+        return [decode(record) for record in json.loads('[' + ','.join(lines) + ']')]
@@ -0,0 +1,117 @@
+'''
+Command line driver for headless batch jobs.
+
+    python -m specht sweep --n 10..30 --kind specht --workers 8 --out results.jsonl
+
+The targets are every partition of every n (for --kind ideal, the ideal of partitions strictly below each
+partition). Results are appended to the output file in the serialization format as soon as they are computed, one
+(key, series) record per line, and targets already in the file are skipped, so an interrupted sweep is resumed by
+running the same command again. The kind is recorded in the header of the output file, and a sweep of another kind
+refuses to append to it, since specht and haiman-woo results share keys.
+
+File contains:
+    def parse_n
+    def sweep_targets
+    def completed_keys
+    def sweep
+'''
+import argparse
+import os
+import sys
+import time
+from partitions import Partitions
+import serialization
+import specht_ideals
+from batch import KINDS, iter_batch_hilbert_series
+
+# parses "10..20", "10..20..5" (with a step) or "8,12,16"
+def parse_n(value):
+    if '..' in value:
+        bounds = [int(x) for x in value.split('..')]
+        step = bounds[2] if len(bounds) == 3 else 1
+        return range(bounds[0], bounds[1] + 1, step)
+    return [int(x) for x in value.split(',')]
+
+# (key, target) for every target of the sweep, keys as in iter_batch_hilbert_series
+def sweep_targets(n_values, kind):
+    seen = set()
+    for n in n_values:
+        for mu in Partitions.iter(n):
+            if kind == 'ideal':
+                target = mu.strictly_less_than_ideal()
+                key = target.key()
+            else:
+                target = key = mu
+            if key not in seen:
+                seen.add(key)
+                yield key, target
+
+# keys of the results already in an output file of a sweep of kind (an empty set if there is no file yet)
+# a last line cut off by an interrupted run is dropped from the file, so the sweep can append after it
+# raises ValueError if the file holds the results of another kind
+def completed_keys(path, kind):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    with open(path, 'r+') as f:
+        text = f.read()
+        if not text.endswith('\n'):
+            text = text[:text.rfind('\n') + 1]
+            f.seek(0)
+            f.truncate(len(text.encode()))
+    if len(text) == 0:
+        return set()
+    file_kind = serialization.read_metadata(text[:text.index('\n')]).get('kind')
+    if file_kind != kind:
+        raise ValueError(f"{path} holds {file_kind or 'unknown'} results, not {kind} ones; use another output file")
+    return {key for key, _ in serialization.decode_many(text)}
+
+# runs a sweep, appending results to out, and returns the number of new results
+# progress and throughput are written to log every interval seconds
+def sweep(n_values, kind='specht', workers=None, out='results.jsonl', interval=10.0, log=sys.stderr):
+    done = completed_keys(out, kind)
+    targets = [target for key, target in sweep_targets(n_values, kind) if key not in done]
+    if log is not None:
+        print(f"{len(targets)} targets to compute, {len(done)} already in {out}", file=log)
+
+    new_file = len(done) == 0
+    count = 0
+    start = last = time.perf_counter()
+    with open(out, 'w' if new_file else 'a') as f:
+        if new_file:
+            serialization.dump([], f, metadata={'kind': kind})
+        for key, hs in iter_batch_hilbert_series(targets, kind, workers):
+            f.write(serialization.dumps((key, hs)) + '\n')
+            f.flush()
+            count += 1
+            now = time.perf_counter()
+            if log is not None and now - last >= interval:
+                print(f"{count}/{len(targets)} done, {count / (now - start):.1f} results/s", file=log)
+                last = now
+
+    if log is not None:
+        elapsed = time.perf_counter() - start
+        print(f"{count} results in {elapsed:.2f}s ({count / elapsed if elapsed > 0 else 0:.1f} results/s)", file=log)
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m specht', description="Batch computations of hilbert series")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sweep_parser = commands.add_parser('sweep', help="compute the series of every partition (or ideal) of every n")
+    sweep_parser.add_argument('--n', type=parse_n, required=True, help="values of n, i.e. 10..30 or 8,12,16")
+    sweep_parser.add_argument('--kind', choices=KINDS, default='specht', help="series to compute")
+    sweep_parser.add_argument('--workers', type=int, help="number of processes (default: every core)")
+    sweep_parser.add_argument('--out', default='results.jsonl', help="output file, appended to when it exists")
+    sweep_parser.add_argument('--store', help="SQLite store shared with other runs, see store.HilbertStore")
+    sweep_parser.add_argument('--interval', type=float, default=10.0, help="seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    if args.store is not None:
+        specht_ideals.set_store(args.store)
+    try:
+        sweep(args.n, args.kind, args.workers, args.out, args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,69 +1,309 @@
 from partitions import *
 from expressions import *
+from cache import HilbertCache
+from store import HilbertStore
+import instrumentation
 import math
-import sympy as sp
-t = sp.symbols('t')
+import time
+from collections import Counter, deque
+
+# process-wide cache of the Hilbert series of I_mu, keyed by partition and shared by every call
+SPECHT_CACHE = HilbertCache()
+
+def specht_cache_info():
+    return SPECHT_CACHE.info()
+
+def clear_specht_cache():
+    SPECHT_CACHE.clear()
+
+# bounds the number of cached partitions (None for no bound), evicting the least recently used ones
+def set_specht_cache_size(maxsize):
+    SPECHT_CACHE.resize(maxsize)
+
+# generators of L_i for every row i, keyed by partition, so the discovery and evaluation passes of the recursion
+# (and every later call) share the same partitions instead of recomputing them
+GENERATOR_CACHE = HilbertCache()
+
+def clear_generator_cache():
+    GENERATOR_CACHE.clear()
+
+def set_generator_cache_size(maxsize):
+    GENERATOR_CACHE.resize(maxsize)
+
+# process-wide cache of the Hilbert series of I_L, keyed by LowerOrderIdeal.key()
+# every sub-ideal of the recursion is cached, so later calls (i.e. a haiman-woo sweep over Partitions(n)) reuse them;
+# while it is unbounded it also keeps them all in memory, see set_ideal_cache_size
+IDEAL_CACHE = HilbertCache()
+
+def ideal_cache_info():
+    return IDEAL_CACHE.info()
+
+def clear_ideal_cache():
+    IDEAL_CACHE.clear()
+
+# a bound (0 to cache nothing) is needed for ideal_specht_hilbert_series to run in bounded memory, since with the
+# default unbounded cache every sub-result stays cached after the call drops it
+def set_ideal_cache_size(maxsize):
+    IDEAL_CACHE.resize(maxsize)
+
+# optional persistent store consulted after the caches, so results survive the process
+STORE = None
+
+# store is a HilbertStore, the path of its SQLite file, or None to stop using one
+def set_store(store):
+    global STORE
+    if store is not None and not isinstance(store, HilbertStore):
+        store = HilbertStore(store)
+    STORE = store
+
+# looks key up in cache, and then in the persistent store if one is set
+def lookup_series(cache, key):
+    hs = cache.get(key)
+    if hs is None and STORE is not None:
+        hs = STORE.get(key)
+        if hs is not None:
+            cache.put(key, hs)
+    return hs
 
 # hilbert series of I_mu, where mu is a partition
 def specht_hilbert_series(mu: Partition):    
+    cached = lookup_series(SPECHT_CACHE, mu)
+    if cached is not None:
+        return cached
+    shortcut = structured_series(mu)
+    if shortcut is not None:
+        SPECHT_CACHE.put(mu, shortcut)
+        return shortcut
+
+    hilbert_series = {} # this dictionary stores the hilbert series of all partitions in recursive_partitions
     recursive_partitions = PartitionSet([mu]) # this set holds the partitions that will be involved in the recursion
-    new_partitions = PartitionSet([mu]) # this set holds the partitions that still need to be processed (we need to store the partitions that are involved with their Hilbert series)
-    while len(new_partitions.partitions) != 0:
-        p = new_partitions.partitions[0]
-        for i in range(1, len(p) + 1):
-            for g in lower_ideal_generators(p, i):
+    new_partitions = deque([mu]) # this queue holds the partitions that still need to be processed (we need to store the partitions that are involved with their Hilbert series)
+    while len(new_partitions) != 0:
+        p = new_partitions.popleft()
+        for gens in all_lower_ideal_generators(p):
+            for g in gens:
                 success = recursive_partitions.add_partition(g)
                 if success:
-                    new_partitions.add_partition(g)
-        new_partitions.remove_partition(p)
+                    # partitions computed by earlier calls or runs, and shapes with a structured series, are not expanded
+                    cached = lookup_series(SPECHT_CACHE, g)
+                    if cached is None:
+                        if not has_structured_series(g):
+                            new_partitions.append(g)
+                    else:
+                        hilbert_series[g] = cached
 
-    hilbert_series = {} # this dictionary stores the hilbert series of all partitions in recursive_partitions
+    new_results = []
+    prof = instrumentation.ACTIVE
     for p in reversed(recursive_partitions.partitions):
-        if len(p) == 1:
-            hilbert_series[p] = HilbExpr(0)
+        if p in hilbert_series:
             continue
-        if p[1] == 1:
-            hilbert_series[p] = HilbExpr(1 - t**(math.comb(sum(p), 2)), sum(p), simplify=True)
-            continue
-
-        hs = HilbExpr(0)
-        for i in range(1, len(p)):
-            gens = lower_ideal_generators(p, i)
-            if len(gens) == 1:
-                hs += HilbExpr(t**(i - 1)) * hilbert_series[gens[0]]
-            else:
-                hs += HilbExpr(t**(i - 1)) * (hilbert_series[gens[0]] + hilbert_series[gens[1]] - hilbert_series[gens[2]])
-        gens = lower_ideal_generators(p, len(p))
-        if len(gens) == 1:
-            hs += HilbExpr(t**(len(p) - 1), 1) * hilbert_series[gens[0]]
-        else:
-            hs += HilbExpr(t**(len(p) - 1), 1) * (hilbert_series[gens[0]] + hilbert_series[gens[1]] - hilbert_series[gens[2]])
-        hilbert_series[p] = hs
+        start = time.perf_counter() if prof is not None else 0
+        hilbert_series[p] = specht_recursion_step(p, hilbert_series)
+        if prof is not None:
+            prof.node('specht', p.size, time.perf_counter() - start)
+        SPECHT_CACHE.put(p, hilbert_series[p])
+        new_results.append((p, hilbert_series[p]))
 
+    if STORE is not None:
+        STORE.put_many(new_results)
     return hilbert_series[mu]
 
-# hilbert series of I_L, where L is a lower order ideal
-def ideal_specht_hilbert_series(L: LowerOrderIdeal):
-    # base cases
+# hilbert series of I_p from the hilbert series of the generators of its smaller ideals, which must be in hilbert_series
+def specht_recursion_step(p: Partition, hilbert_series):
+    shortcut = structured_series(p)
+    if shortcut is not None:
+        return shortcut
+
+    # the last row contributes t^(len(p) - 1) / (1 - t) times its series, the others t^(i - 1) times theirs
+    hs = HilbSum()
+    for i, gens in enumerate(all_lower_ideal_generators(p), 1):
+        b = 1 if i == len(p) else 0
+        hs.add(hilbert_series[gens[0]], i - 1, b)
+        if len(gens) == 3:
+            hs.add(hilbert_series[gens[1]], i - 1, b)
+            hs.add(hilbert_series[gens[2]], i - 1, b, sign=-1)
+    return hs.result()
+
+# structured_series is used for the families below when this is True; set it to False to send every shape except the
+# base cases (n) and (1^n) through the generic recursion, i.e. to check the shortcuts against it (see verify.py)
+STRUCTURED_SHORTCUTS = True
+
+# hilbert series of I_p for the shapes that do not need the generic recursion, or None for any other shape:
+#     (n)                      the unit ideal, so the series is 0
+#     (1^n)                    (1 - t^(n choose 2)) / (1 - t)^n
+#     two rows (n - b, b)      closed form for b <= TWO_ROW_MAX_B, see _two_row_series
+#     hooks (m, 1^b)           transfer recursion over the hooks (j, 1^c), see _hook_series
+# rectangles (a^k) with k >= 3 recurse into shapes outside the family and have no shortcut
+def structured_series(p: Partition):
+    if len(p) == 1:
+        return HilbExpr(0)
+    if p[1] == 1:
+        return _column_series(p.size)
+    if not STRUCTURED_SHORTCUTS:
+        return None
+    if len(p) == 2:
+        return _two_row_series(p.size, p[2]) if p[2] <= TWO_ROW_MAX_B else None
+    if p[2] == 1:
+        return _hook_series(p[1], len(p) - 1)
+    return None
+
+def _column_series(n):
+    return HilbExpr([1] + [0] * (math.comb(n, 2) - 1) + [-1], n, simplify=True)
+
+# (n - b, b): the numerator has coefficients binomial(n - b - 1 + i, i) for i < b and binomial(n - 1, b - 2) in
+# degree b, over (1 - t)^b
+# derivation: write a = n - b and N(a, b) for this numerator. For a > b the generators of the recursion are (a - 1, b)
+# in row 1 and (a, b - 1) in row 2, so I_(a, b) = I_(a - 1, b) + t / (1 - t) I_(a, b - 1), which over (1 - t)^b is
+# N(a, b) = N(a - 1, b) + t N(a, b - 1) with no division. The coefficients above satisfy this by Pascal's rule, i.e.
+# binomial(a - 2 + i, i) + binomial(a - 2 + i, i - 1) = binomial(a - 1 + i, i), and in degree b
+# binomial(a + b - 2, b - 2) + binomial(a + b - 2, b - 3) = binomial(a + b - 1, b - 2). The start b = 1 is
+# I_(n - 1, 1) = 1 / (1 - t), the ideal of the line where all coordinates are equal.
+# For a = b, row 1 gives (a - 1, a - 1, 1) instead, which is not a two-row shape, so the square case is not covered by
+# the induction, and every (a, b) depends on the square (b, b) through the recurrence above. The squares are only
+# checked against the generic recursion (python verify.py --only structured --n 2..64, i.e. b <= 32), so the closed form
+# is only used up to that b and larger two-row shapes go through the generic recursion.
+TWO_ROW_MAX_B = 32
+
+def _two_row_series(n, b):
+    coeffs = [math.comb(n - b - 1 + i, i) for i in range(b)] + [math.comb(n - 1, b - 2) if b >= 2 else 0]
+    return HilbExpr(coeffs, b)
+
+# (m, 1^b): the recursion step stays among hooks, with
+#     I_(j, 1^c) = (1 + t + ... + t^(c - 1)) I_(j - 1, 1^c) + t^c / (1 - t) I_(j, 1^(c - 1))
+# this is specht_recursion_step for p = (j, 1^c) with j >= 2: lower_ideal_generators gives the single generator
+# (j - 1, 1^c) for each of the rows 1, ..., c, contributing t^(i - 1) for row i, and (j, 1^(c - 1)) for the last row
+# c + 1, contributing t^c / (1 - t), so nothing outside the family is needed
+# written over (1 - t)^c, the numerators N(j, c) satisfy N(j, c) = [c] N(j - 1, c) + t^c N(j, c - 1) with
+# N(1, c) = [c (c + 1) / 2] (from I_(1^(c + 1))) and N(j, 0) = 0, where [k] = 1 + t + ... + t^(k - 1), so the table
+# is filled in row by row on plain coefficient lists without any division
+def _hook_series(m, b):
+    row = [[] for _ in range(m)] # row[j - 1] is N(j, c - 1)
+    for c in range(1, b + 1):
+        new_row = [[1] * math.comb(c + 1, 2)]
+        for j in range(2, m + 1):
+            prev = new_row[-1]
+            # [c] * N(j - 1, c) as a sliding window sum, plus t^c * N(j, c - 1)
+            n = [0] * max(len(prev) + c - 1, len(row[j - 1]) + c)
+            window = 0
+            for k in range(len(prev) + c - 1):
+                if k < len(prev):
+                    window += prev[k]
+                if k >= c:
+                    window -= prev[k - c]
+                n[k] = window
+            for k, x in enumerate(row[j - 1], c):
+                n[k] += x
+            new_row.append(n)
+        row = new_row
+    return HilbExpr(row[m - 1], b, simplify=True)
+
+# shapes handled by structured_series, which the recursion does not need to expand
+def has_structured_series(p: Partition):
+    if not STRUCTURED_SHORTCUTS:
+        return len(p) == 1 or p[1] == 1
+    return len(p) == 1 or (len(p) == 2 and p[2] <= TWO_ROW_MAX_B) or p[2] == 1
+
+# hilbert series of I_L for the base cases of the recursion, or for sub-ideals that are already known
+def _known_ideal_series(L: LowerOrderIdeal, key, checkpoint):
     if len(L.generators) == 1:
         return specht_hilbert_series(L.generators[0])
-    if len(L.partitions) == 0:
-        return HilbExpr(1, L.n) 
-
-    hs = HilbExpr(0)
-    max_len = max([len(g) for g in L.generators])
-    for i in range(max_len - 1):
-        hs += HilbExpr(t**i)  * ideal_specht_hilbert_series(L.smaller_ideal(i + 1))
-    hs += HilbExpr(t**(max_len - 1), 1) * ideal_specht_hilbert_series(L.smaller_ideal(max_len))
+    if len(L) == 0:
+        return HilbExpr(1, L.n)
+    hs = lookup_series(IDEAL_CACHE, key)
+    if hs is None and checkpoint is not None:
+        hs = checkpoint.get(key)
     return hs
 
+# hilbert series of I_L, where L is a lower order ideal
+# the sub-ideals L_i of the recursion form a DAG that is discovered with an explicit stack and then evaluated children
+# first, so deep ideals never hit the recursion limit, and a sub-result is dropped as soon as every sub-ideal that
+# uses it is finished (this only frees memory when IDEAL_CACHE is bounded, see set_ideal_cache_size)
+# checkpoint is an optional object with get(key) and checkpoint[key] = series, keyed by LowerOrderIdeal.key() tuples,
+# that is consulted before a sub-ideal is expanded and receives each sub-ideal as soon as it is finished, so an
+# interrupted computation can be resumed from it: a dict within the process, or a store.HilbertStore to persist it
+# (shelve does not work, since its keys must be strings)
+def ideal_specht_hilbert_series(L: LowerOrderIdeal, checkpoint=None):
+    root = L.key()
+    values = {} # finished sub-ideals that are still needed
+    children = {} # expanded sub-ideal -> (sub-ideal, k, b) for each term t^k / (1 - t)^b * I_(sub-ideal)
+    sizes = {}
+    order = [] # expanded sub-ideals, each one after all of its children
+
+    prof = instrumentation.ACTIVE
+    times = {}
+
+    stack = [(L, False)]
+    while len(stack) != 0:
+        I, expanded = stack.pop()
+        if expanded:
+            order.append(I)
+            continue
+        key = I.key()
+        if key in values or key in children:
+            continue
+        hs = _known_ideal_series(I, key, checkpoint)
+        if hs is not None:
+            values[key] = hs
+            continue
+
+        start = time.perf_counter() if prof is not None else 0
+        max_len = max([len(g) for g in I.generators])
+        sub_ideals = [I.smaller_ideal(i + 1) for i in range(max_len)]
+        children[key] = [(S.key(), i, 1 if i == max_len - 1 else 0) for i, S in enumerate(sub_ideals)]
+        sizes[key] = I.n
+        if prof is not None:
+            times[key] = time.perf_counter() - start
+
+        # children are pushed above the marker, so they are all finished when the marker comes back off the stack
+        stack.append((key, True))
+        stack.extend((S, False) for S in sub_ideals)
+
+    parents = Counter(child for key in order for child, _, _ in children[key])
+    for key in order:
+        start = time.perf_counter() if prof is not None else 0
+        hs = HilbSum()
+        for child, k, b in children[key]:
+            hs.add(values[child], k, b)
+        hs = hs.result()
+        values[key] = hs
+        if prof is not None:
+            prof.node('ideal', sizes[key], times[key] + time.perf_counter() - start)
+
+        IDEAL_CACHE.put(key, hs)
+        if STORE is not None:
+            STORE.put(key, hs)
+        if checkpoint is not None:
+            checkpoint[key] = hs
+
+        for child, _, _ in children.pop(key):
+            parents[child] -= 1
+            if parents[child] == 0 and child != root:
+                del values[child]
+
+    return values[root]
+
 # hilbert series of I_mu / I_(<mu), the module discussed in the Haiman-Woo manuscript
 def haiman_woo_hilbert_series(mu: Partition):    
     I = mu.strictly_less_than_ideal()
     return ideal_specht_hilbert_series(I) - specht_hilbert_series(mu)
 
+# generators of L_i for i = 1, ..., len(mu) as a tuple of tuples, cached in GENERATOR_CACHE
+def all_lower_ideal_generators(mu: Partition):
+    gens = GENERATOR_CACHE.get(mu)
+    if gens is None:
+        if instrumentation.ACTIVE is not None:
+            instrumentation.ACTIVE.count('lower_ideal_generators', len(mu))
+        gens = tuple(tuple(_lower_ideal_generators(mu, i)) for i in range(1, len(mu) + 1))
+        GENERATOR_CACHE.put(mu, gens)
+    return gens
+
 # generators of L_i, where L is the lower order ideal generated by the partion mu
 def lower_ideal_generators(mu: Partition, i):
+    if i < 1 or i > len(mu):
+        return _lower_ideal_generators(mu, i)
+    return list(all_lower_ideal_generators(mu)[i - 1])
+
+def _lower_ideal_generators(mu: Partition, i):
     if len(mu) == 1 or mu[1] == 1:
         return [] # these are base cases for the recursive formula, so we don't consider the generators
 
@@ -78,4 +318,4 @@ def lower_ideal_generators(mu: Partition, i):
     if m == 0 or m == i:
         return [ith_compression.remove_from_part(i)]
 
-    return [mu.remove_from_part(m), ith_compression.remove_from_part(i), ith_compression.remove_from_part(m)]
\ No newline at end of file
+    return [mu.remove_from_part(m), ith_compression.remove_from_part(i), ith_compression.remove_from_part(m)]
@@ -0,0 +1,78 @@
+'''
+File contains:
+    class HilbertStore
+'''
+import json
+import os
+import sqlite3
+from partitions import Partition
+from expressions import HilbExpr
+
+class HilbertStore:
+    # persistent store of computed hilbert series in a SQLite file
+    # keys are partitions (series of I_mu) or LowerOrderIdeal.key() tuples (series of I_L)
+    # the database runs in WAL mode with a busy timeout and only ever inserts, so several processes can share one file
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, a INTEGER NOT NULL, coeffs TEXT NOT NULL, "
+                "PRIMARY KEY (kind, key))")
+
+    # connections cannot be shared with forked worker processes, so each process opens its own
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._connection
+
+    # (kind, key) columns for a partition or an ideal key
+    @staticmethod
+    def _encode_key(key):
+        if isinstance(key, Partition):
+            return 'specht', ",".join(map(str, key.tparts))
+        n, generators = key
+        return 'ideal', f"{n}:" + ";".join(",".join(map(str, g)) for g in sorted(generators, reverse=True))
+
+    def get(self, key, default=None):
+        row = self._connect().execute(
+            "SELECT a, coeffs FROM series WHERE kind = ? AND key = ?", self._encode_key(key)).fetchone()
+        if row is None:
+            return default
+        return HilbExpr._from_coeffs(json.loads(row[1]), row[0])
+
+    def __contains__(self, key):
+        return self._connect().execute(
+            "SELECT 1 FROM series WHERE kind = ? AND key = ?", self._encode_key(key)).fetchone() is not None
+
+    def put(self, key, hs):
+        self.put_many([(key, hs)])
+
+    # store[key] = hs, so a store can be the checkpoint of specht_ideals.ideal_specht_hilbert_series
+    def __setitem__(self, key, hs):
+        self.put(key, hs)
+
+    # writes all (key, hilbert series) pairs in one transaction, keeping existing entries
+    def put_many(self, items):
+        rows = [self._encode_key(key) + (hs.a, json.dumps(hs.coeffs)) for key, hs in items]
+        if len(rows) == 0:
+            return
+        with self._connect() as connection:
+            connection.executemany("INSERT OR IGNORE INTO series (kind, key, a, coeffs) VALUES (?, ?, ?, ?)", rows)
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM series").fetchone()[0]
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __repr__(self):
+        return f"HilbertStore({self.path!r})"
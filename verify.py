@@ -0,0 +1,145 @@
+'''
+Consistency checks for the shortcuts of the recursion.
+
+    python verify.py
+    python verify.py --only structured --n 2..40
+
+Every check compares a fast path with the plain definition it replaces and prints the cases where they differ (the
+exit code is 1 when there is a mismatch):
+    structured      structured_series against the generic recursion (specht_ideals.STRUCTURED_SHORTCUTS off); the
+                    two-row closed form is only used up to specht_ideals.TWO_ROW_MAX_B, which --n 2..64 covers
+    smaller_ideal   LowerOrderIdeal.smaller_ideal against its definition over all of Partitions(n - 1)
+    equiv           EquivHilbExpr arithmetic against SymPy, and identical reduced forms for equal values
+'''
+import argparse
+import random
+import sys
+from partitions import Partition, Partitions, LowerOrderIdeal
+import specht_ideals
+from specht_ideals import specht_hilbert_series, clear_specht_cache, clear_generator_cache
+import expressions
+from expressions import EquivHilbExpr
+from specht import parse_n
+
+# the two-row and hook partitions of n
+def structured_shapes(n):
+    shapes = [Partition([n - b, b]) for b in range(1, n // 2 + 1)]
+    shapes += [Partition([n - b] + [1] * b) for b in range(2, n - 1)]
+    return shapes
+
+def _specht_series(shapes, shortcuts):
+    previous = specht_ideals.STRUCTURED_SHORTCUTS
+    specht_ideals.STRUCTURED_SHORTCUTS = shortcuts
+    try:
+        clear_specht_cache()
+        clear_generator_cache()
+        return [specht_hilbert_series(p) for p in shapes]
+    finally:
+        specht_ideals.STRUCTURED_SHORTCUTS = previous
+        clear_specht_cache()
+
+# structured_series against the generic recursion on every two-row and hook partition of n
+def check_structured(n):
+    shapes = structured_shapes(n)
+    fast = _specht_series(shapes, True)
+    generic = _specht_series(shapes, False)
+    return [(p, f"structured {hs}, generic {expected}")
+            for p, hs, expected in zip(shapes, fast, generic) if hs != expected]
+
+# the definition smaller_ideal implements: every partition p of n - 1 with p.add_to_part(k) in L
+def brute_force_smaller_ideal(L, k):
+    I = LowerOrderIdeal(L.n - 1)
+    for p in Partitions.iter(L.n - 1):
+        q = p.add_to_part(k)
+        if any(q <= g for g in L.generators):
+            I.add_partition_to_ideal(p)
+    return I
+
+# smaller_ideal against its definition, for every k, on principal ideals and on random ideals with several generators
+# (seeded by n, so runs are reproducible)
+def check_smaller_ideal(n, samples=30):
+    partitions = list(Partitions.iter(n))
+    rng = random.Random(n)
+    ideals = [LowerOrderIdeal(n, [p]) for p in partitions]
+    ideals += [LowerOrderIdeal(n, rng.sample(partitions, rng.randint(2, min(4, len(partitions)))))
+               for _ in range(samples if len(partitions) > 1 else 0)]
+    failures = []
+    for L in ideals:
+        for k in range(1, n + 2):
+            expected = brute_force_smaller_ideal(L, k)
+            I = L.smaller_ideal(k)
+            if I.key() != expected.key() or set(I) != set(expected):
+                failures.append(((L.key(), k), f"smaller_ideal {I.generators}, definition {expected.generators}"))
+    return failures
+
+# a random equivariant series with n numerator terms and up to 3 denominator factors of total degree at most n
+def _random_equiv(rng, n):
+    numerator = {(rng.randint(0, n), rng.randint(0, n)): rng.randint(-3, 3) for _ in range(n)}
+    factors = [(i, j) for i in range(n + 1) for j in range(n + 1 - i) if (i, j) != (0, 0)]
+    denominator = {rng.choice(factors): rng.randint(1, 2) for _ in range(rng.randint(0, 3))}
+    return EquivHilbExpr(numerator, denominator)
+
+# EquivHilbExpr arithmetic (seeded by n): sums, products and differences against SymPy, and the reduced form, where
+# equal values have identical (n, d) however they were computed
+def check_equiv(n, samples=10):
+    import sympy
+    failures = []
+    def same(name, x, y):
+        if (x.n, x.d) != (y.n, y.d):
+            failures.append((name, f"{x.n} / {x.d} and {y.n} / {y.d} are equal but reduced differently"))
+
+    one = EquivHilbExpr(1, {(1, 0): 1})
+    same('(1 + t)/(1 - t^2)', EquivHilbExpr({(0, 0): 1, (1, 0): 1}, {(2, 0): 1}) + 0, one)
+    x = EquivHilbExpr({(0, 0): 1, (1, 0): 1}, {(1, 0): 1, (2, 0): 1})
+    same('5 (1 + t)/((1 - t)(1 - t^2))', x + x + x + x + x, EquivHilbExpr(5, {(1, 0): 2}))
+    same('1/ONE_MINUS_T^2', EquivHilbExpr(1, expressions.ONE_MINUS_T**2), EquivHilbExpr(1, {(1, 0): 2}))
+
+    rng = random.Random(n)
+    for _ in range(samples):
+        x = _random_equiv(rng, n)
+        y = _random_equiv(rng, n)
+        for name, result, expected in (('+', x + y, x.as_expr() + y.as_expr()), ('*', x * y, x.as_expr() * y.as_expr()),
+                                       ('-', x - y, x.as_expr() - y.as_expr())):
+            if sympy.cancel(result.as_expr() - expected) != 0:
+                failures.append(((x, name, y), f"{result}, SymPy {sympy.cancel(expected)}"))
+        same((x, '+', y), x + y, y + x)
+        same((x, '+ y - y'), x + y - y, x * 1)
+        same((x, 'as SymPy'), EquivHilbExpr(x.numerator, x.denominator, simplify=True), x * 1)
+    return failures
+
+CHECKS = {
+    'structured': (check_structured, range(2, 41)),
+    'smaller_ideal': (check_smaller_ideal, range(2, 11)),
+    'equiv': (check_equiv, range(1, 6)),
+}
+
+def run_checks(names, n_values=None, log=sys.stderr):
+    failures = []
+    for name in names:
+        check, default_n = CHECKS[name]
+        for n in (n_values if n_values is not None else default_n):
+            for case, message in check(n):
+                failures.append((name, n, case, message))
+                if log is not None:
+                    print(f"MISMATCH {name} n={n} {case}: {message}", file=log)
+        if log is not None:
+            print(f"{name:>15} done", file=log)
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the shortcuts of the recursion against their definitions")
+    parser.add_argument('--only', help="comma separated checks to run (default: all), from " + ", ".join(CHECKS))
+    parser.add_argument('--n', type=parse_n, help="values of n for every check, i.e. 2..20 or 8,12,16")
+    args = parser.parse_args(argv)
+
+    names = list(CHECKS) if args.only is None else args.only.split(',')
+    for name in names:
+        if name not in CHECKS:
+            parser.error(f"unknown check {name}")
+
+    failures = run_checks(names, args.n)
+    print(f"{len(failures)} mismatches", file=sys.stderr)
+    return 1 if len(failures) > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())